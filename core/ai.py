@@ -13,17 +13,35 @@ Responsibilities:
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import logging
+import math
+import operator
 import re
-import socket
+import sqlite3
 import sys
-from contextlib import contextmanager
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from enum import Enum
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterator
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from pydantic import SecretStr, ValidationError
 
 from core.models import AIAnalysisResult, AIConfig
 
+try:  # optional fast JSON parser; orjson.JSONDecodeError subclasses json.JSONDecodeError
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover - fallback when orjson is not installed
+    _json_loads = json.loads
+
 logger = logging.getLogger("mailbot.ai")
 
 # ──────────────────────────────────────────────
@@ -68,13 +86,6 @@ If the email is in a DIFFERENT language, provide a faithful translation of the c
 TRANSLATION_RULE_AUTO = """[Translation Rule]
 The user's language mode is "auto" — set "translation" to null. The summary should be in the same language as the email."""
 
-USER_PROMPT_TEMPLATE = """Analyze the email:
-
-From: {sender}
-Subject: {subject}
-Body:
-{body}"""
-
 # JSON Schema for structured output enforcement
 ANALYSIS_SCHEMA = {
     "type": "object",
@@ -108,6 +119,357 @@ ANALYSIS_SCHEMA = {
     "additionalProperties": False,
 }
 
+# Shared completion options for every analysis request
+_COMPLETION_OPTIONS: dict[str, Any] = {
+    "response_format": {"type": "json_object"},
+    "temperature": 0.3,
+    "max_tokens": 800,
+    "timeout": 30,
+}
+
+# Provider id → litellm model prefix required for routing
+_PROVIDER_PREFIX: dict[str, str] = {
+    "deepseek": "deepseek/",
+    "ollama": "ollama/",
+    "ollama_chat": "ollama_chat/",
+}
+
+# Bodies shorter than this cannot be classified; analyze_email skips the LLM
+MIN_ANALYZE_CHARS = 20
+
+# Lower-case substrings; at least one must occur for _SKIP_PATTERNS to match
+_SKIP_LITERALS: tuple[str, ...] = ("验证码", "verification", "登录", "login", "sign", "code")
+
+# Pre-compiled patterns (compiled once at import, reused for every email)
+_SKIP_PATTERNS = re.compile(
+    r"(验证码|verification\s*code|登录|login|sign.?in|code\s*[:：])",
+    re.IGNORECASE,
+)
+
+
+# Local verification-code classification (skips the LLM for OTP emails)
+FAST_CLASSIFY_MAX_CHARS = 600
+# A code keyword, then an explicit separator (":", "is", "为"/"是"), then the
+# digits: "Your code review request #12345" or "order 20241015" never match
+_OTP_RE = re.compile(
+    r"(?:验证码|校验码|認証コード|verification\s*code|security\s*code|passcode|one[-\s]?time\s*(?:password|code)|\botp\b"
+    r"|(?:login|sign[-\s]?in|auth\w*)\s+code)"
+    r"\s*(?:[:：]|(?:\bis\b|为|是)\s*[:：]?)\s*(?<![\d#])(\d{4,8})(?!\d)",
+    re.IGNORECASE,
+)
+_CODE_SUMMARIES: dict[str, str] = {
+    "zh": "验证码：{code}",
+    "ja": "認証コード：{code}",
+    "en": "Verification code: {code}",
+}
+
+# Complete "summary" string in a partially streamed JSON response
+_SUMMARY_FIELD_RE = re.compile(r'"summary"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+# Script character classes for detect_language_simple
+_HANZI_RE = re.compile("[\u4e00-\u9fff]")
+_KANA_RE = re.compile("[\u3040-\u309f\u30a0-\u30ff]")
+_HANGUL_RE = re.compile("[\uac00-\ud7af]")
+_ARABIC_RE = re.compile("[\u0600-\u06ff]")
+_CYRILLIC_RE = re.compile("[\u0400-\u04ff]")
+_LATIN_RE = re.compile("[A-Za-z]")
+# Union of every non-Latin range above, for the pure-Latin fast path
+_NON_LATIN_SCRIPT_RE = re.compile(
+    "[\u0400-\u04ff\u0600-\u06ff\u3040-\u30ff\u4e00-\u9fff\uac00-\ud7af]"
+)
+
+
+def _build_skip_matcher() -> Callable[[str], bool]:
+    """Return a predicate telling whether any of ``_SKIP_LITERALS`` occurs.
+
+    Uses a single-pass Aho-Corasick automaton when the optional
+    ``pyahocorasick`` package is installed, else one substring scan per literal.
+    """
+    try:
+        import ahocorasick
+    except ImportError:
+        return lambda text: any(lit in text for lit in _SKIP_LITERALS)
+
+    automaton = ahocorasick.Automaton()
+    for lit in _SKIP_LITERALS:
+        automaton.add_word(lit, lit)
+    automaton.make_automaton()
+    return lambda text: next(automaton.iter(text), None) is not None
+
+
+_has_skip_literal = _build_skip_matcher()
+
+
+# ──────────────────────────────────────────────
+#  Body truncation
+# ──────────────────────────────────────────────
+
+MAX_BODY_CHARS = 2000
+MAX_BODY_TOKENS = 1500
+
+_body_encoding: Any = None
+_body_encoding_loaded = False
+
+
+# ──────────────────────────────────────────────
+#  Result cache (exact match)
+# ──────────────────────────────────────────────
+
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL = 3600  # seconds
+
+
+class _ResultCache:
+    """Thread-safe LRU cache of AIAnalysisResult with a per-entry TTL.
+
+    Retries, duplicate notifications and repeated button clicks on the same
+    email produce byte-identical prompts; serving them from memory skips the
+    LLM round-trip (and its token cost) entirely.
+    """
+
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: OrderedDict[bytes, tuple[float, AIAnalysisResult]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> AIAnalysisResult | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        return result.model_copy()
+
+    def put(self, key: bytes, result: AIAnalysisResult) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, result.model_copy())
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_RESULT_CACHE = _ResultCache()
+
+# Near-duplicate (L2) cache: keyed on a normalized body so template mails that
+# differ only in digits or whitespace (receipts, newsletters) share one result.
+_SIMILAR_CACHE = _ResultCache()
+_DIGITS_RE = re.compile(r"\d+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _result_cache_key(
+    config: AIConfig,
+    rules_block: str | None,
+    sender: str,
+    subject: str,
+    body: str,
+) -> bytes:
+    """Hash everything that influences the prompt into a compact cache key."""
+    raw = "\x1f".join((
+        config.provider,
+        config.model,
+        config.base_url or "",
+        config.language or "auto",
+        rules_block or "",
+        sender,
+        subject,
+        body,
+    ))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+
+
+def _similar_cache_key(
+    config: AIConfig,
+    rules_block: str | None,
+    subject: str,
+    body: str,
+) -> bytes:
+    """Cache key for near-duplicate emails: digits masked, whitespace collapsed."""
+    return _result_cache_key(
+        config, rules_block, "", _normalize_similar(subject), _normalize_similar(body),
+    )
+
+
+def _normalize_similar(text: str) -> str:
+    """Mask digits and collapse whitespace so template instances compare equal."""
+    return _WHITESPACE_RE.sub(" ", _DIGITS_RE.sub("#", text)).strip().lower()
+
+
+def _is_reusable_for_similar(result: AIAnalysisResult) -> bool:
+    """Return True if a result carries nothing specific to one email instance.
+
+    Codes, amounts and dates are exactly what near-duplicates differ in, so a
+    result that quotes digits must never be served for a sibling email.
+    """
+    if result.extracted_code:
+        return False
+    return not any(
+        _DIGITS_RE.search(text) for text in (result.summary, result.translation or "")
+    )
+
+
+# Embedding (L3) index: opt-in via ai.semantic_cache_embedding_model; catches
+# paraphrased templates the digit/whitespace normalization misses.
+EMBEDDING_CACHE_SIZE = 256
+
+
+class _EmbeddingIndex:
+    """Bounded in-memory index of embedding → AIAnalysisResult.
+
+    Lookups are a linear cosine scan; with a few hundred entries that costs
+    far less than one LLM round-trip and needs no vector-store dependency.
+    Entries are scoped by prompt settings so a result is only reused for the
+    same model, language and rules.
+    """
+
+    def __init__(self, maxsize: int = EMBEDDING_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL) -> None:
+        self._ttl = ttl
+        self._entries: deque[tuple[float, bytes, tuple[float, ...], float, AIAnalysisResult]] = (
+            deque(maxlen=maxsize)
+        )
+        self._lock = threading.Lock()
+
+    def search(
+        self,
+        scope: bytes,
+        vector: tuple[float, ...],
+        threshold: float,
+    ) -> AIAnalysisResult | None:
+        norm = math.hypot(*vector)
+        if not norm:
+            return None
+        now = time.monotonic()
+        best: AIAnalysisResult | None = None
+        best_score = threshold
+        with self._lock:
+            for expires_at, entry_scope, entry_vector, entry_norm, result in self._entries:
+                if expires_at < now or entry_scope != scope or len(entry_vector) != len(vector):
+                    continue
+                score = sum(map(operator.mul, vector, entry_vector)) / (norm * entry_norm)
+                if score >= best_score:
+                    best, best_score = result, score
+        return best.model_copy() if best is not None else None
+
+    def add(self, scope: bytes, vector: tuple[float, ...], result: AIAnalysisResult) -> None:
+        norm = math.hypot(*vector)
+        if not norm:
+            return
+        with self._lock:
+            self._entries.append(
+                (time.monotonic() + self._ttl, scope, vector, norm, result.model_copy())
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_EMBEDDING_INDEX = _EmbeddingIndex()
+
+
+# Persistent exact-match store: opt-in via ai.result_cache_path so results
+# survive restarts (IMAP re-delivery, regenerated summaries after a reboot).
+PERSISTENT_CACHE_TTL_DAYS = 1.0
+
+
+class _SqliteResultCache:
+    """SQLite-backed exact-match result store (WAL mode, per-row TTL).
+
+    Sits behind the in-memory LRU: a hit here is promoted into memory.
+    Storage errors are logged and treated as misses, never raised.
+    """
+
+    def __init__(self, path: Path, ttl_days: float = PERSISTENT_CACHE_TTL_DAYS) -> None:
+        self._ttl_days = ttl_days
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_result_cache ("
+                " prompt_hash BLOB PRIMARY KEY,"
+                " model_name TEXT NOT NULL,"
+                " provider TEXT NOT NULL,"
+                " response_text TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " ttl_days REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "DELETE FROM ai_result_cache WHERE created_at + ttl_days * 86400 < ?",
+                (time.time(),),
+            )
+
+    def get(self, key: bytes) -> AIAnalysisResult | None:
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT response_text FROM ai_result_cache"
+                    " WHERE prompt_hash = ? AND created_at + ttl_days * 86400 >= ?",
+                    (key, time.time()),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("AI result store read failed: %s", e)
+            return None
+        if row is None:
+            return None
+        try:
+            return AIAnalysisResult.model_validate_json(row[0])
+        except ValidationError:
+            return None
+
+    def put(self, key: bytes, config: AIConfig, result: AIAnalysisResult) -> None:
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ai_result_cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, config.model, config.provider, result.model_dump_json(),
+                     time.time(), self._ttl_days),
+                )
+        except sqlite3.Error as e:
+            logger.warning("AI result store write failed: %s", e)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_sqlite_caches: dict[str, _SqliteResultCache] = {}
+_sqlite_caches_lock = threading.Lock()
+
+
+def _result_store(config: AIConfig) -> _SqliteResultCache | None:
+    """Return the persistent store for ``config.result_cache_path``, if configured."""
+    path = config.result_cache_path
+    if not path:
+        return None
+    with _sqlite_caches_lock:
+        store = _sqlite_caches.get(path)
+        if store is None:
+            try:
+                store = _sqlite_caches[path] = _SqliteResultCache(Path(path))
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Cannot open AI result store %s: %s", path, e)
+                return None
+    return store
+
+
+class _CacheKeys(NamedTuple):
+    """Keys computed during lookup, reused to store the fresh result."""
+    exact: bytes
+    similar: bytes | None = None
+    scope: bytes | None = None
+    embedding: tuple[float, ...] | None = None
+
 
 # ──────────────────────────────────────────────
 #  Prompt construction  (Feat 3: Runtime Injection)
@@ -115,63 +477,113 @@ ANALYSIS_SCHEMA = {
 
 def build_system_prompt(config: AIConfig, rules_block: str | None = None) -> str:
     """
-    Assemble the final system prompt following priority order:
+    Assemble the final system prompt, static sections first:
 
-        1.  JSON config constraints  (highest — language, mode)
+        1.  Base system prompt       (lowest — default behaviour)
         2.  Markdown persona rules   (medium)
-        3.  Base system prompt       (lowest — default behaviour)
+        3.  JSON config constraints  (highest — language, mode)
 
-    Conflict rule: JSON config > Markdown rules > Base prompt.
+    Conflict rule: JSON config > Markdown rules > Base prompt.  The stable
+    base + rules text forms an exact prefix across calls so provider-side
+    prompt caching can hit; only the short config tail varies.
     """
-    sections: list[str] = []
+    return _system_prompt(config.language or "auto", rules_block)
+
+
+@lru_cache(maxsize=32)
+def _system_prompt(lang: str, rules_block: str | None) -> str:
+    """Return the joined system prompt for a (language, rules) pair; memoized."""
+    static, dynamic = _system_prompt_parts(lang, rules_block)
+    return f"{static}\n\n{dynamic}"
+
+
+@lru_cache(maxsize=32)
+def _system_prompt_parts(lang: str, rules_block: str | None) -> tuple[str, str]:
+    """Return the (static prefix, config constraints) prompt parts; memoized."""
+    # --- Layers 3 + 2: Base prompt, then Markdown persona rules (stable prefix) ---
+    static = f"{BASE_SYSTEM_PROMPT}\n\n{rules_block}" if rules_block else BASE_SYSTEM_PROMPT
 
     # --- Layer 1: System-level constraint from JSON config (highest priority) ---
-    lang = config.language or "auto"
+    dynamic = _CONSTRAINT_SECTIONS.get(lang)
+    if dynamic is None:
+        dynamic = _constraint_section(lang)
+
+    return static, dynamic
+
+
+def _constraint_section(lang: str) -> str:
+    """Format the language + translation constraints for one target language."""
+    if lang == "auto":
+        return TRANSLATION_RULE_AUTO
     lang_name = LANGUAGE_NAMES.get(lang, lang)
-    if lang != "auto":
-        sections.append(LANGUAGE_CONSTRAINT_TEMPLATE.format(language=lang_name))
-        sections.append(
-            TRANSLATION_RULE_SAME.format(target=lang, target_name=lang_name)
-        )
-    else:
-        sections.append(TRANSLATION_RULE_AUTO)
+    return "\n\n".join((
+        LANGUAGE_CONSTRAINT_TEMPLATE.format(language=lang_name),
+        TRANSLATION_RULE_SAME.format(target=lang, target_name=lang_name),
+    ))
+
 
-    # --- Layer 2: Persona rules from Markdown (medium priority) ---
-    if rules_block:
-        sections.append(rules_block)
+# Constraint sections for every built-in language, formatted once at import
+_CONSTRAINT_SECTIONS: dict[str, str] = {lang: _constraint_section(lang) for lang in LANGUAGE_NAMES}
 
-    # --- Layer 3: Base system prompt (lowest priority) ---
-    sections.append(BASE_SYSTEM_PROMPT)
 
-    return "\n\n".join(sections)
+def _user_msg(sender: str, subject: str, body: str) -> str:
+    """Format the user message for one email (f-string, no format-spec parsing)."""
+    return f"Analyze the email:\n\nFrom: {sender}\nSubject: {subject}\nBody:\n{body}"
 
 
 # ──────────────────────────────────────────────
-#  Core helpers
+#  litellm setup (once-init, pooled HTTP sessions)
 # ──────────────────────────────────────────────
 
-@contextmanager
-def _bypass_socket_proxy() -> Iterator[None]:
-    """Temporarily restore the original (un-patched) socket.
+HTTP_POOL_MAX_KEEPALIVE = 20
+HTTP_POOL_MAX_CONNECTIONS = 100
+HTTP_POOL_KEEPALIVE_EXPIRY = 30.0  # seconds an idle connection is kept open
+
+# litellm module, imported and configured once by _ensure_litellm()
+_litellm: Any = None
+_litellm_ready = False
+_litellm_lock = threading.Lock()
+
+# Expected request failures (timeouts, HTTP errors); logged without traceback.
+# Extended with openai.APIError, the base of litellm's exceptions, on setup.
+_llm_errors: tuple[type[Exception], ...] = (TimeoutError, ConnectionError)
 
-    ``apply_global_proxy`` monkey-patches ``socket.socket`` with PySocks so that
-    IMAP connections are transparently proxied.  However, httpx (used by litellm)
-    already honours ``HTTP(S)_PROXY`` env-vars and sets up its own proxy tunnel.
-    If the socket is *also* patched, httpx ends up double-proxying the connection
-    (socket-level proxy → HTTP-level proxy), which causes an SSL EOF error.
 
-    This context manager swaps the original socket back for the duration of the
-    ``with`` block so that httpx/litellm use only env-var-based proxying.
+def _install_http_sessions(litellm: Any) -> None:
+    """Give litellm long-lived httpx clients so TLS connections are reused.
+
+    Without a shared session many providers open a fresh TCP+TLS connection
+    per request.  Called once from ``_ensure_litellm`` (after the proxy
+    environment has been applied at startup); the clients keep up to
+    ``HTTP_POOL_MAX_KEEPALIVE`` idle connections alive.  HTTP/2 is enabled
+    only when ``h2`` is installed.
     """
-    from utils.helpers import _ORIGINAL_SOCKET
+    try:
+        import httpx
+    except ImportError:
+        logger.debug("httpx not available, litellm keeps its default sessions")
+        return
 
-    patched = socket.socket
-    socket.socket = _ORIGINAL_SOCKET
     try:
-        yield
-    finally:
-        socket.socket = patched
+        import h2  # noqa: F401
+
+        http2 = True
+    except ImportError:
+        http2 = False
 
+    limits = httpx.Limits(
+        max_keepalive_connections=HTTP_POOL_MAX_KEEPALIVE,
+        max_connections=HTTP_POOL_MAX_CONNECTIONS,
+        keepalive_expiry=HTTP_POOL_KEEPALIVE_EXPIRY,
+    )
+    litellm.client_session = httpx.Client(limits=limits, http2=http2, timeout=30)
+    litellm.aclient_session = httpx.AsyncClient(limits=limits, http2=http2, timeout=30)
+    logger.debug("Installed pooled litellm HTTP sessions (http2=%s)", http2)
+
+
+# ──────────────────────────────────────────────
+#  Core helpers
+# ──────────────────────────────────────────────
 
 def _patch_litellm_cost_map(exc: FileNotFoundError) -> None:
     """Create missing litellm JSON data files so the module can be re-imported.
@@ -202,43 +614,299 @@ def _default_result() -> AIAnalysisResult:
 
 def _build_litellm_params(config: AIConfig) -> dict:
     """Build kwargs dict for litellm.completion based on provider config."""
-    params: dict = {
-        "model": config.model,
-    }
+    # Returns a fresh dict each call so callers may safely mutate it
+    return dict(
+        _litellm_params_for(config.model, config.provider, config.api_key, config.base_url)
+    )
 
-    if config.api_key:
-        params["api_key"] = config.api_key.get_secret_value()
 
-    if config.base_url:
-        params["api_base"] = config.base_url
+@lru_cache(maxsize=8)
+def _litellm_params_for(
+    model: str,
+    provider: str,
+    api_key: SecretStr | None,
+    base_url: str | None,
+) -> tuple[tuple[str, str], ...]:
+    """Memoized worker for ``_build_litellm_params``.
 
-    # Provider-specific model prefix for litellm routing
-    model = config.model
-    provider = config.provider.lower()
-    prefix_map = {
-        "deepseek": "deepseek/",
-        "ollama": "ollama/",
-        "ollama_chat": "ollama_chat/",
+    Keyed on the provider-relevant config values, so runtime changes to
+    language / enabled do not invalidate it while a new model or key does.
+    The secret is unwrapped once per distinct key instead of once per email.
+    """
+    params: dict[str, str] = {
+        "model": model,
     }
 
-    prefix = prefix_map.get(provider)
+    if api_key:
+        params["api_key"] = api_key.get_secret_value()
+
+    if base_url:
+        params["api_base"] = base_url
+
+    # Provider-specific model prefix for litellm routing
+    prefix = _PROVIDER_PREFIX.get(provider.lower())
     if prefix and not model.startswith(prefix):
         params["model"] = f"{prefix}{model}"
 
-    return params
+    return tuple(params.items())
 
 
 def _parse_response(raw_text: str) -> AIAnalysisResult:
     """Parse LLM response text into AIAnalysisResult, handling markdown fences."""
     text = raw_text.strip()
 
-    # Strip markdown code fences if present
+    # Strip markdown code fences if present (fixed literals, no regex needed)
     if text.startswith("```"):
-        text = re.sub(r"^```(?:json)?\s*", "", text)
-        text = re.sub(r"\s*```$", "", text)
+        text = text[3:]
+        if text[:4].lower() == "json":  # ```json / ```JSON language tag
+            text = text[4:]
+    if text.endswith("```"):
+        text = text[:-3]
+    text = text.strip()
+
+    # Parse + validate in one pass (pydantic-core's Rust JSON parser, no dict)
+    result = AIAnalysisResult.model_validate_json(text)
+
+    # Small closed vocabularies: intern so repeats share one str object
+    result.category = sys.intern(result.category)
+    if result.source_language is not None:
+        result.source_language = sys.intern(result.source_language)
+    return result
+
+
+def _ensure_litellm() -> Any | None:
+    """Import and configure litellm exactly once; None when it is unavailable.
+
+    Setup (drop_params, logger adoption, pooled sessions) runs only on the
+    first call; later calls return the cached module or the cached failure.
+    """
+    global _litellm, _litellm_ready, _llm_errors
+    if _litellm_ready:
+        return _litellm
+
+    with _litellm_lock:
+        if not _litellm_ready:
+            _litellm = _load_litellm()
+            if _litellm is not None:
+                try:
+                    from openai import APIError
+
+                    _llm_errors = (APIError, TimeoutError, ConnectionError)
+                except ImportError:
+                    pass
+            _litellm_ready = True
+    return _litellm
+
+
+def _load_litellm() -> Any | None:
+    """Import and configure litellm; return None when it is unavailable."""
+    try:
+        import litellm  # lazy import to avoid hard dependency
+    except ImportError:
+        logger.error("litellm not installed — run: pip install litellm")
+        return None
+    except FileNotFoundError as exc:
+        # PyInstaller bundle may lack litellm data files; patch and retry.
+        _patch_litellm_cost_map(exc)
+        try:
+            import litellm  # type: ignore[reimported]  # noqa: F811
+        except Exception:
+            logger.error("litellm data files missing and could not be recreated")
+            return None
+
+    _configure_litellm(litellm)
+    return litellm
+
+
+def _configure_litellm(litellm: Any) -> None:
+    """One-time litellm setup shared by the normal and the patched import path."""
+    from utils.logger import adopt_dependency_loggers, get_active_log_level
+
+    litellm.drop_params = True  # ignore unsupported params per provider
+    litellm.aiohttp_trust_env = True  # honor HTTP_PROXY / HTTPS_PROXY as per docs
+    adopt_dependency_loggers(("LiteLLM",), level=get_active_log_level(), force_handlers=False)
+    _install_http_sessions(litellm)
+
+
+def _get_body_encoding() -> Any | None:
+    """Return litellm's bundled cl100k tiktoken encoding, or None if unavailable.
+
+    The bundled copy works offline; a plain ``tiktoken.get_encoding`` call
+    would try to download the BPE file on first use.
+    """
+    global _body_encoding, _body_encoding_loaded
+    if not _body_encoding_loaded:
+        try:
+            from litellm.litellm_core_utils.default_encoding import encoding
+        except Exception:
+            logger.debug("tiktoken encoding unavailable, truncating by characters only")
+            encoding = None
+        _body_encoding = encoding
+        _body_encoding_loaded = True
+    return _body_encoding
+
 
-    data = json.loads(text)
-    return AIAnalysisResult.model_validate(data)
+def _truncate_body(body: str) -> str:
+    """Truncate body to the character cap, then to the token budget.
+
+    CJK text costs 1-3 tokens per character, so the token cap keeps the
+    prompt size consistent across languages.  Falls back to the character
+    cap alone when no tokenizer is available.
+    """
+    truncated = body[:MAX_BODY_CHARS]
+    encoding = _get_body_encoding()
+    if encoding is None:
+        return truncated
+
+    tokens = encoding.encode(truncated, disallowed_special=())
+    if len(tokens) <= MAX_BODY_TOKENS:
+        return truncated
+    # A cut inside a multi-byte character decodes to U+FFFD; drop it
+    return encoding.decode(tokens[:MAX_BODY_TOKENS]).rstrip("\ufffd")
+
+
+def _lookup_cached(
+    subject: str,
+    sender: str,
+    truncated_body: str,
+    config: AIConfig,
+    rules_block: str | None,
+) -> tuple[AIAnalysisResult | None, _CacheKeys]:
+    """Check the result caches; return (cached result, keys for storing).
+
+    May call the embedding API when ``semantic_cache_embedding_model`` is set.
+    """
+    cache_key = _result_cache_key(config, rules_block, sender, subject, truncated_body)
+    cached = _RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        logger.debug("AI analysis cache hit: %s", subject[:50])
+        return cached, _CacheKeys(cache_key)
+
+    store = _result_store(config)
+    if store is not None:
+        cached = store.get(cache_key)
+        if cached is not None:
+            logger.debug("AI analysis persistent cache hit: %s", subject[:50])
+            _RESULT_CACHE.put(cache_key, cached)
+            return cached, _CacheKeys(cache_key)
+
+    if not config.semantic_cache_enabled:
+        return None, _CacheKeys(cache_key)
+
+    similar_key = _similar_cache_key(config, rules_block, subject, truncated_body)
+    cached = _SIMILAR_CACHE.get(similar_key)
+    if cached is not None:
+        logger.debug("AI analysis near-duplicate cache hit: %s", subject[:50])
+        return cached, _CacheKeys(cache_key, similar_key)
+
+    if not config.semantic_cache_embedding_model:
+        return None, _CacheKeys(cache_key, similar_key)
+
+    scope = _result_cache_key(config, rules_block, "", "", "")
+    embedding = _embed(
+        config, f"{_normalize_similar(subject)}\n{_normalize_similar(truncated_body)}",
+    )
+    if embedding is not None:
+        cached = _EMBEDDING_INDEX.search(scope, embedding, config.semantic_cache_threshold)
+        if cached is not None:
+            logger.debug("AI analysis embedding cache hit: %s", subject[:50])
+    return cached, _CacheKeys(cache_key, similar_key, scope, embedding)
+
+
+def _embed(config: AIConfig, text: str) -> tuple[float, ...] | None:
+    """Embed text with the configured litellm embedding model; None on failure."""
+    litellm = _ensure_litellm()
+    if litellm is None:
+        return None
+
+    params = _build_litellm_params(config)
+    params["model"] = config.semantic_cache_embedding_model
+    try:
+        response = litellm.embedding(input=[text], timeout=10, **params)
+        item = response.data[0]
+        vector = item["embedding"] if isinstance(item, dict) else item.embedding
+        return tuple(vector)
+    except Exception as e:
+        logger.warning("Embedding for similarity cache failed: %s", e)
+        return None
+
+
+def _build_messages(
+    subject: str,
+    sender: str,
+    truncated_body: str,
+    config: AIConfig,
+    rules_block: str | None,
+) -> list[dict[str, Any]]:
+    """Build the chat messages (dynamic system prompt + formatted email).
+
+    For Anthropic models the static prompt prefix is sent as its own content
+    block marked with ``cache_control`` so it is served from the prompt
+    cache (the prefix must exceed the provider's minimum, ~1024 tokens).
+    """
+    user_msg = _user_msg(sender, subject, truncated_body)
+    if _is_anthropic(config):
+        static, dynamic = _system_prompt_parts(config.language or "auto", rules_block)
+        system_content: Any = [
+            {"type": "text", "text": static, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": dynamic},
+        ]
+    else:
+        system_content = build_system_prompt(config, rules_block)
+    return [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": user_msg},
+    ]
+
+
+def _is_anthropic(config: AIConfig) -> bool:
+    """Return True when the request is routed to Anthropic (supports cache_control)."""
+    return config.provider.lower() == "anthropic" or config.model.startswith(("anthropic/", "claude"))
+
+
+def _handle_completion(
+    response: Any,
+    keys: _CacheKeys,
+    config: AIConfig,
+) -> AIAnalysisResult:
+    """Extract and parse the completion content, caching successful results.
+
+    Raises json.JSONDecodeError / ValidationError on malformed output.
+    Missing choices or empty content are checked explicitly and return the
+    default result without raising.
+    """
+    choices = getattr(response, "choices", None)
+    if not choices:
+        logger.warning("LLM returned no choices")
+        return _default_result()
+
+    return _finish_raw(getattr(choices[0].message, "content", None), keys, config)
+
+
+def _finish_raw(raw: str | None, keys: _CacheKeys, config: AIConfig) -> AIAnalysisResult:
+    """Parse raw completion text and store the result in the caches.
+
+    Raises json.JSONDecodeError / ValidationError on malformed output.
+    """
+    if not raw:
+        logger.warning("LLM returned empty content")
+        return _default_result()
+
+    # Parse JSON into AIAnalysisResult model (handles markdown fences)
+    result = _parse_response(raw)
+    logger.info(
+        "AI analysis OK: category=%s priority=%d source_lang=%s",
+        result.category, result.priority, result.source_language,
+    )
+    _RESULT_CACHE.put(keys.exact, result)
+    store = _result_store(config)
+    if store is not None:
+        store.put(keys.exact, config, result)
+    if keys.similar is not None and _is_reusable_for_similar(result):
+        _SIMILAR_CACHE.put(keys.similar, result)
+        if keys.scope is not None and keys.embedding is not None:
+            _EMBEDDING_INDEX.add(keys.scope, keys.embedding, result)
+    return result
 
 
 # ──────────────────────────────────────────────
@@ -271,81 +939,337 @@ def analyze_email(
         logger.debug("AI analysis disabled, returning default")
         return _default_result()
 
+    local = _local_result(subject, body, config)
+    if local is not None:
+        return local
+
+    # Step 1: Truncate body to the char/token budget for cost and latency
+    truncated_body = _truncate_body(body)
+
+    # Step 2: Serve repeated prompts from the in-memory result caches
+    cached, keys = _lookup_cached(subject, sender, truncated_body, config, rules_block)
+    if cached is not None:
+        return cached
+
+    litellm = _ensure_litellm()
+    if litellm is None:
+        return _default_result()
+
+    # Step 3: Build system prompt (config → rules → base) and user message
+    messages = _build_messages(subject, sender, truncated_body, config, rules_block)
+
+    # Step 4: Prepare LLM provider-specific parameters (model, API key, base URL)
+    params = _build_litellm_params(config)
+
     try:
-        import litellm  # lazy import to avoid hard dependency
+        # Step 5: Call the LLM
+        response = litellm.completion(
+            messages=messages,
+            **_COMPLETION_OPTIONS,
+            **params,
+        )
 
-        from utils.logger import adopt_dependency_loggers, get_active_log_level
+        # Step 6: Extract, parse and cache the JSON response
+        return _handle_completion(response, keys, config)
 
-        litellm.drop_params = True  # ignore unsupported params per provider
-        litellm.aiohttp_trust_env = True  # honor HTTP_PROXY / HTTPS_PROXY as per docs
-        adopt_dependency_loggers(("LiteLLM",), level=get_active_log_level(), force_handlers=False)
-    except ImportError:
-        logger.error("litellm not installed — run: pip install litellm")
+    except (json.JSONDecodeError, ValidationError) as e:
+        logger.warning("Failed to parse LLM JSON output: %s", e)
+        return _default_result()
+    except _llm_errors as e:
+        logger.warning("LLM request failed: %s", e)
+        return _default_result()
+    except Exception:
+        logger.exception("AI analysis failed, returning default")
         return _default_result()
-    except FileNotFoundError as exc:
-        # PyInstaller bundle may lack litellm data files; patch and retry.
-        _patch_litellm_cost_map(exc)
-        try:
-            import litellm  # type: ignore[reimported]  # noqa: F811
 
-            litellm.drop_params = True
-        except Exception:
-            logger.error("litellm data files missing and could not be recreated")
-            return _default_result()
 
-    # Step 1: Truncate body to ~2000 chars for cost and latency
-    truncated_body = body[:2000] if len(body) > 2000 else body
+async def analyze_email_async(
+    subject: str,
+    sender: str,
+    body: str,
+    config: AIConfig,
+    rules_block: str | None = None,
+) -> AIAnalysisResult:
+    """
+    Coroutine variant of ``analyze_email`` using ``litellm.acompletion``.
+
+    Lets callers running an event loop (e.g. the Telegram bot's AI loop)
+    keep several analyses in flight without blocking a thread per request.
+
+    Args:
+        subject: email subject
+        sender: sender address
+        body: cleaned plain-text body
+        config: AI configuration
+        rules_block: optional persona rules prompt block from RulesManager
+
+    Returns:
+        AIAnalysisResult (may be default on failure)
+    """
+    if not config.enabled:
+        logger.debug("AI analysis disabled, returning default")
+        return _default_result()
 
-    # Step 2: Build dynamic system prompt (Feat 3: config → rules → base)
-    system_prompt = build_system_prompt(config, rules_block)
+    litellm = _ensure_litellm()
+    if litellm is None:
+        return _default_result()
 
-    # Step 3: Format user message with email metadata
-    user_msg = USER_PROMPT_TEMPLATE.format(
-        sender=sender,
-        subject=subject,
-        body=truncated_body,
+    params = _build_litellm_params(config)
+    return await _analyze_async(
+        litellm, params, None, subject, sender, body, config, rules_block,
     )
 
-    # Step 4: Prepare LLM provider-specific parameters (model, API key, base URL)
+
+async def analyze_email_stream(
+    subject: str,
+    sender: str,
+    body: str,
+    config: AIConfig,
+    rules_block: str | None = None,
+    on_summary: Callable[[str], Awaitable[None]] | None = None,
+) -> AIAnalysisResult:
+    """
+    Streaming variant of ``analyze_email_async``.
+
+    The response is streamed and ``on_summary`` is awaited once, as soon as
+    the "summary" field has fully arrived (it is emitted first), so callers
+    can show it before the rest of the JSON (e.g. the translation) is done.
+    Cache hits and local results return immediately without a callback.
+
+    Returns:
+        The complete AIAnalysisResult (may be default on failure)
+    """
+    if not config.enabled:
+        logger.debug("AI analysis disabled, returning default")
+        return _default_result()
+
+    local = _local_result(subject, body, config)
+    if local is not None:
+        return local
+
+    truncated_body = _truncate_body(body)
+    if config.semantic_cache_enabled and config.semantic_cache_embedding_model:
+        cached, keys = await asyncio.to_thread(
+            _lookup_cached, subject, sender, truncated_body, config, rules_block,
+        )
+    else:
+        cached, keys = _lookup_cached(subject, sender, truncated_body, config, rules_block)
+    if cached is not None:
+        return cached
+
+    litellm = _ensure_litellm()
+    if litellm is None:
+        return _default_result()
+
+    messages = _build_messages(subject, sender, truncated_body, config, rules_block)
     params = _build_litellm_params(config)
+    try:
+        raw = ""
+        summary_sent = on_summary is None
+        stream = await litellm.acompletion(
+            messages=messages,
+            stream=True,
+            **_COMPLETION_OPTIONS,
+            **params,
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            raw += delta
+            if not summary_sent:
+                summary = _streamed_summary(raw)
+                if summary is not None:
+                    summary_sent = True
+                    await on_summary(summary)  # type: ignore[misc]
+        return _finish_raw(raw, keys, config)
+    except (json.JSONDecodeError, ValidationError) as e:
+        logger.warning("Failed to parse LLM JSON output: %s", e)
+        return _default_result()
+    except _llm_errors as e:
+        logger.warning("LLM request failed: %s", e)
+        return _default_result()
+    except Exception:
+        logger.exception("AI analysis failed, returning default")
+        return _default_result()
+
 
+def _streamed_summary(partial: str) -> str | None:
+    """Return the "summary" value once its closing quote has streamed in."""
+    match = _SUMMARY_FIELD_RE.search(partial)
+    if match is None:
+        return None
     try:
-        # Step 5: Bypass socket-level proxy to avoid double-proxying with httpx
-        with _bypass_socket_proxy():
-            response = litellm.completion(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_msg},
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3,
-                max_tokens=800,
-                timeout=30,
-                **params,
-            )
+        return _json_loads(f'"{match.group(1)}"')
+    except json.JSONDecodeError:
+        return None
+
+
+async def analyze_emails_batch(
+    items: list[tuple[str, str, str]],
+    config: AIConfig,
+    rules_block: str | None = None,
+    max_concurrency: int = 8,
+) -> list[AIAnalysisResult]:
+    """
+    Analyze several emails concurrently via ``litellm.acompletion``.
+
+    Network round-trips overlap instead of running back to back, bounded by
+    ``max_concurrency`` in-flight requests. Cache hits never reach the network.
+
+    Args:
+        items: (subject, sender, body) tuples
+        config: AI configuration
+        rules_block: optional persona rules prompt block from RulesManager
+        max_concurrency: maximum number of concurrent LLM requests
+
+    Returns:
+        One AIAnalysisResult per item, in input order (default on failure)
+    """
+    if not config.enabled:
+        logger.debug("AI analysis disabled, returning defaults")
+        return [_default_result() for _ in items]
+
+    if not items:
+        return []
+
+    litellm = _ensure_litellm()
+    if litellm is None:
+        return [_default_result() for _ in items]
+
+    params = _build_litellm_params(config)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    results = await asyncio.gather(*(
+        _analyze_async(litellm, params, semaphore, subject, sender, body, config, rules_block)
+        for subject, sender, body in items
+    ))
+    return list(results)
 
-        # Step 6: Extract and validate JSON response
-        raw = response.choices[0].message.content  # type: ignore[union-attr]
-        if not raw:
-            logger.warning("LLM returned empty content")
-            return _default_result()
-
-        # Step 7: Parse JSON into AIAnalysisResult model (handles markdown fences)
-        result = _parse_response(raw)
-        logger.info(
-            "AI analysis OK: category=%s priority=%d source_lang=%s",
-            result.category, result.priority, result.source_language,
+
+async def _analyze_async(
+    litellm: Any,
+    params: dict,
+    semaphore: asyncio.Semaphore | None,
+    subject: str,
+    sender: str,
+    body: str,
+    config: AIConfig,
+    rules_block: str | None,
+) -> AIAnalysisResult:
+    """Analyze one email with ``acompletion``; never raises."""
+    local = _local_result(subject, body, config)
+    if local is not None:
+        return local
+
+    truncated_body = _truncate_body(body)
+    if config.semantic_cache_enabled and config.semantic_cache_embedding_model:
+        # Embedding lookup is a blocking HTTP call; keep it off the event loop
+        cached, keys = await asyncio.to_thread(
+            _lookup_cached, subject, sender, truncated_body, config, rules_block,
         )
-        return result
+    else:
+        cached, keys = _lookup_cached(subject, sender, truncated_body, config, rules_block)
+    if cached is not None:
+        return cached
 
-    except json.JSONDecodeError as e:
+    messages = _build_messages(subject, sender, truncated_body, config, rules_block)
+    try:
+        async with semaphore or nullcontext():
+            response = await litellm.acompletion(
+                messages=messages,
+                **_COMPLETION_OPTIONS,
+                **params,
+            )
+        return _handle_completion(response, keys, config)
+    except (json.JSONDecodeError, ValidationError) as e:
         logger.warning("Failed to parse LLM JSON output: %s", e)
         return _default_result()
+    except _llm_errors as e:
+        logger.warning("LLM request failed: %s", e)
+        return _default_result()
     except Exception:
         logger.exception("AI analysis failed, returning default")
         return _default_result()
 
 
+class SkipReason(str, Enum):
+    """Why an email does not need an LLM call."""
+    TOO_SHORT = "too_short"        # empty / trivially short, nothing to classify
+    SHORT_BODY = "short_body"      # short enough to forward as-is (Hybrid mode)
+    ACTION_CODE = "action_code"    # verification code / login alert heuristic
+
+
+def skip_reason(body: str) -> SkipReason | None:
+    """
+    Classify whether an email can bypass AI analysis, and why.
+
+    Returns None when the email should be analyzed.  Only ``TOO_SHORT``
+    bypasses ``analyze_email`` itself; Hybrid mode skips on any reason.
+    """
+    if len(body) < MIN_ANALYZE_CHARS:
+        return SkipReason.TOO_SHORT
+    if len(body) < 100:
+        return SkipReason.SHORT_BODY
+
+    # Cheap literal gate: most emails contain none of the keywords, so the
+    # regex only runs to disambiguate when a candidate substring is present
+    head = body[:300].lower()
+    if not _has_skip_literal(head):
+        return None
+
+    if _SKIP_PATTERNS.search(head) is not None:
+        return SkipReason.ACTION_CODE
+    return None
+
+
+def _local_result(subject: str, body: str, config: AIConfig) -> AIAnalysisResult | None:
+    """Answer without the LLM when possible (cheap first stage of the cascade).
+
+    Returns a synthesized verification-code result when ``_fast_classify`` is
+    confident and the default result for trivially short bodies; None means
+    the LLM must be called.  The code check runs first: code emails are often
+    shorter than ``MIN_ANALYZE_CHARS`` (or carry the code in the subject).
+    """
+    if config.local_code_extraction:
+        result = _fast_classify(subject, body, config.language or "auto")
+        if result is not None:
+            logger.debug("AI analysis bypassed: %s", SkipReason.ACTION_CODE.value)
+            return result
+
+    if skip_reason(body) is SkipReason.TOO_SHORT:
+        logger.debug("AI analysis bypassed: %s", SkipReason.TOO_SHORT.value)
+        return _default_result()
+    return None
+
+
+def _fast_classify(subject: str, body: str, language: str) -> AIAnalysisResult | None:
+    """Classify a short verification-code email locally, or return None.
+
+    Only fires when the body is short and a 4-8 digit code follows a code
+    keyword and an explicit separator, so login alerts that merely mention a
+    year, an amount or a ticket number still go to the LLM.
+    """
+    if len(body) > FAST_CLASSIFY_MAX_CHARS:
+        return None
+
+    match = _OTP_RE.search(subject) or _OTP_RE.search(body)
+    if match is None:
+        return None
+
+    code = match.group(1)
+    source_language = detect_language_simple(body)
+    summary_lang = source_language if language == "auto" else language
+    template = _CODE_SUMMARIES.get(summary_lang or "en", _CODE_SUMMARIES["en"])
+    return AIAnalysisResult(
+        summary=template.format(code=code),
+        category="verification_code",
+        priority=1,
+        extracted_code=code,
+        source_language=source_language,
+    )
+
+
 def should_skip_ai(body: str) -> bool:
     """
     Hybrid mode heuristic: return True if the email is short or matches
@@ -353,18 +1277,12 @@ def should_skip_ai(body: str) -> bool:
 
     Used in Mode B to decide whether to call AI automatically.
     """
-    if len(body) < 100:
-        return True
+    reason = skip_reason(body)
+    if reason is None:
+        return False
+    logger.debug("AI bypassed: %s", reason.value)
+    return True
 
-    # Quick regex check for common short-action patterns
-    skip_patterns = re.compile(
-        r"(验证码|verification\s*code|登录|login|sign.?in|code\s*[:：])",
-        re.IGNORECASE,
-    )
-    if skip_patterns.search(body[:300]):
-        return True
-
-    return False
 
 def detect_language_simple(text: str) -> str | None:
     """
@@ -385,13 +1303,22 @@ def detect_language_simple(text: str) -> str | None:
     
     sample = text[:1000]
     
-    # Count character types
-    cjk_count = sum(1 for c in sample if '\u4e00' <= c <= '\u9fff' or '\u3040' <= c <= '\u309f' or '\u30a0' <= c <= '\u30ff' or '\uac00' <= c <= '\ud7af')
-    arabic_count = sum(1 for c in sample if '\u0600' <= c <= '\u06ff')
-    cyrillic_count = sum(1 for c in sample if '\u0400' <= c <= '\u04ff')
-    latin_count = sum(1 for c in sample if ord(c) < 128 and c.isalpha())
+    # Count character types: each count is one C-level regex scan, and the
+    # per-script CJK counts are shared with the CJK disambiguation below.
+    # Most mail is pure Latin, so one combined search rules out the five
+    # non-Latin scans before running them.
+    latin_count = len(_LATIN_RE.findall(sample))
+    if _NON_LATIN_SCRIPT_RE.search(sample) is None:
+        hanzi = hiragana_katakana = hangul = arabic_count = cyrillic_count = 0
+    else:
+        hanzi = len(_HANZI_RE.findall(sample))
+        hiragana_katakana = len(_KANA_RE.findall(sample))
+        hangul = len(_HANGUL_RE.findall(sample))
+        arabic_count = len(_ARABIC_RE.findall(sample))
+        cyrillic_count = len(_CYRILLIC_RE.findall(sample))
+    cjk_count = hanzi + hiragana_katakana + hangul
     
-    total_chars = len([c for c in sample if c.isalpha()])
+    total_chars = sum(map(str.isalpha, sample))
     
     if total_chars == 0:
         return None
@@ -404,11 +1331,7 @@ def detect_language_simple(text: str) -> str | None:
     
     # Detect CJK (Chinese, Japanese, Korean)
     if cjk_ratio > 0.3:
-        # Try to distinguish between Chinese, Japanese, Korean
-        hiragana_katakana = sum(1 for c in sample if '\u3040' <= c <= '\u309f' or '\u30a0' <= c <= '\u30ff')
-        hangul = sum(1 for c in sample if '\uac00' <= c <= '\ud7af')
-        hanzi = sum(1 for c in sample if '\u4e00' <= c <= '\u9fff')
-        
+        # Distinguish between Chinese, Japanese, Korean
         if hiragana_katakana > hanzi:
             return 'ja'  # Japanese (has hiragana/katakana)
         elif hangul > hanzi:
@@ -16,14 +16,20 @@ Responsibilities:
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import os
+import random
+import re
 import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Coroutine, NamedTuple
 
-from core.ai import analyze_email
+from core.ai import analyze_email_async, analyze_email_stream
 from core.models import (
     AIAnalysisResult,
     AIConfig,
@@ -31,13 +37,66 @@ from core.models import (
     EmailSnapshot,
     OperationMode,
 )
-from core.notifiers.telegram import TelegramNotifier
+from core.notifiers.telegram import (
+    LANGUAGE_LABELS,
+    MODE_LABELS,
+    TelegramNotifier,
+    card_labels,
+)
 from core.rules import RulesManager
 
 logger = logging.getLogger("mailbot.bot")
 
 CONFIG_PATH = Path("config.json")
 
+# Emails kept for Hybrid/Agent button callbacks (summary / translate / original)
+EMAIL_CACHE_SIZE = 200
+# Emails not touched (cached or clicked) for this long are dropped
+EMAIL_CACHE_TTL_SECONDS = 6 * 3600
+
+# Poll-failure backoff: doubles from 1 s up to this cap, plus up to 1 s of jitter
+POLL_BACKOFF_MAX_SECONDS = 60.0
+
+# On-demand AI tasks (summary / translate / /ai) running at once on the AI loop
+AI_TASK_CONCURRENCY = 5
+
+# /rules inline keyboard, serialized once (the Bot API accepts reply_markup as a JSON string)
+_RULES_KEYBOARD_JSON = json.dumps({
+    "inline_keyboard": [
+        [
+            {"text": "➕ Add", "callback_data": "rules_add"},
+            {"text": "🗑 Delete", "callback_data": "rules_delete"},
+        ],
+        [
+            {"text": "❌ Close", "callback_data": "rules_close"},
+        ],
+    ]
+})
+
+_HELP_TEXT = (
+    "🤖 <b>MailBot</b> commands:\n"
+    "\n"
+    "/settings — open settings dashboard\n"
+    "/rules — view / manage persona rules\n"
+    "/rules add — add a new rule\n"
+    "/rules delete — delete a rule\n"
+    "/ai — reply to a message to analyze with AI\n"
+    "/help — show this help"
+)
+
+# First number in a /rules delete reply ("3", "delete 3", ...)
+_NUM_RE = re.compile(r"\d+")
+
+# Quiet period after the last settings change before config.json is rewritten
+PERSIST_DEBOUNCE_SECONDS = 1.0
+
+
+class _RuntimeState(NamedTuple):
+    """Immutable runtime settings, swapped as a whole on every change."""
+    mode: OperationMode
+    language: str
+    ai_enabled: bool
+
 
 class TelegramBotHandler:
     """
@@ -69,17 +128,20 @@ class TelegramBotHandler:
         self._ai_config = ai_config
         self._config_path = config_path
 
-        # Global operation mode (thread-safe via lock)
-        self._mode = default_mode
-        self._mode_lock = threading.Lock()
-
-        # Language setting (thread-safe)
-        self._language = ai_config.language or "auto"
-        self._lang_lock = threading.Lock()
+        # Mode / language / AI flag: readers load the current tuple without a
+        # lock (attribute reads are atomic); writers copy-on-write under one lock
+        self._state = _RuntimeState(
+            mode=default_mode,
+            language=ai_config.language or "auto",
+            ai_enabled=ai_config.enabled,
+        )
+        self._state_lock = threading.Lock()
 
-        # AI enabled flag (thread-safe)
-        self._ai_enabled = ai_config.enabled
-        self._ai_enabled_lock = threading.Lock()
+        # Debounced config.json persistence (see _schedule_persist); the
+        # state last written lets a flush skip toggles that cancel out
+        self._persist_timer: threading.Timer | None = None
+        self._persist_lock = threading.Lock()
+        self._persisted_state = self._state
 
         # Rules manager
         self._rules = RulesManager()
@@ -89,8 +151,15 @@ class TelegramBotHandler:
         self._thread: threading.Thread | None = None
         self._stop_event = threading.Event()
 
-        # Cache: uid -> EmailSnapshot body for hybrid callback
-        self._email_cache: dict[str, EmailSnapshot] = {}
+        # Event loop thread for on-demand AI work (summary / translate / /ai),
+        # so several button presses are analyzed concurrently off the poller
+        self._ai_loop: asyncio.AbstractEventLoop | None = None
+        self._ai_thread: threading.Thread | None = None
+        self._ai_slots: asyncio.Semaphore | None = None
+
+        # Cache: uid -> EmailSnapshot body for hybrid callback (LRU order)
+        # Values are (last access monotonic time, snapshot)
+        self._email_cache: OrderedDict[str, tuple[float, EmailSnapshot]] = OrderedDict()
         # Cache: uid -> source_language for hybrid mode translate button decision
         self._source_language_cache: dict[str, str | None] = {}
         self._cache_lock = threading.Lock()
@@ -99,39 +168,54 @@ class TelegramBotHandler:
         self._rules_pending: dict[str, str] = {}
         self._rules_lock = threading.Lock()
 
+        # callback_data routing: exact matches first, then the token before "_"
+        self._exact_callbacks: dict[str, Callable[[str, str, int], None]] = {
+            "settings_lang": self._cb_settings_lang,
+            "settings_mode": self._cb_settings_mode,
+            "settings_back": self._cb_settings_back,
+            "settings_close": self._cb_settings_close,
+            "rules_add": self._cb_rules_add,
+            "rules_delete": self._cb_rules_delete,
+            "rules_close": self._cb_rules_close,
+        }
+        self._prefix_callbacks: dict[str, Callable[[str, str, str, int], None]] = {
+            "lang": self._cb_language_switch,
+            "mode": self._cb_mode_switch,
+            "summ": self._cb_summary,
+            "orig": self._cb_show_original,
+            "trans": self._cb_translate,
+        }
+
     # ──────────────────────────────────────────────
     #  Properties
     # ──────────────────────────────────────────────
 
     @property
     def mode(self) -> OperationMode:
-        with self._mode_lock:
-            return self._mode
+        return self._state.mode
 
     @mode.setter
     def mode(self, value: OperationMode) -> None:
-        with self._mode_lock:
-            self._mode = value
+        with self._state_lock:
+            self._state = self._state._replace(mode=value)
 
     @property
     def language(self) -> str:
-        with self._lang_lock:
-            return self._language
+        return self._state.language
 
     @language.setter
     def language(self, value: str) -> None:
-        with self._lang_lock:
-            self._language = value
+        with self._state_lock:
+            self._state = self._state._replace(language=value)
 
     @property
     def ai_enabled(self) -> bool:
-        with self._ai_enabled_lock:
-            return self._ai_enabled
+        return self._state.ai_enabled
 
     @ai_enabled.setter
     def ai_enabled(self, value: bool) -> None:
-        with self._ai_enabled_lock:
-            self._ai_enabled = value
+        with self._state_lock:
+            self._state = self._state._replace(ai_enabled=value)
 
     @property
     def rules_block(self) -> str | None:
@@ -144,19 +228,36 @@ class TelegramBotHandler:
 
     def cache_email(self, snapshot: EmailSnapshot, source_language: str | None = None) -> None:
         """Store email snapshot and its source language for later AI callback."""
+        now = time.monotonic()
         with self._cache_lock:
-            self._email_cache[snapshot.uid] = snapshot
+            self._email_cache[snapshot.uid] = (now, snapshot)
+            self._email_cache.move_to_end(snapshot.uid)
             if source_language:
                 self._source_language_cache[snapshot.uid] = source_language
-            if len(self._email_cache) > 200:
-                oldest = list(self._email_cache.keys())[:100]
-                for key in oldest:
-                    self._email_cache.pop(key, None)
-                    self._source_language_cache.pop(key, None)
+            # Entries are in access order, so both the idle-expired ones and
+            # the over-capacity ones sit at the front: O(1) per eviction
+            cutoff = now - EMAIL_CACHE_TTL_SECONDS
+            while self._email_cache and (
+                len(self._email_cache) > EMAIL_CACHE_SIZE
+                or next(iter(self._email_cache.values()))[0] < cutoff
+            ):
+                key, _ = self._email_cache.popitem(last=False)
+                self._source_language_cache.pop(key, None)
 
     def _get_cached_email(self, uid: str) -> EmailSnapshot | None:
+        now = time.monotonic()
         with self._cache_lock:
-            return self._email_cache.get(uid)
+            entry = self._email_cache.get(uid)
+            if entry is None:
+                return None
+            if entry[0] < now - EMAIL_CACHE_TTL_SECONDS:
+                del self._email_cache[uid]
+                self._source_language_cache.pop(uid, None)
+                return None
+            # Button clicks keep the email alive (access-order LRU)
+            self._email_cache[uid] = (now, entry[1])
+            self._email_cache.move_to_end(uid)
+            return entry[1]
 
     def _get_cached_source_language(self, uid: str) -> str | None:
         with self._cache_lock:
@@ -166,25 +267,86 @@ class TelegramBotHandler:
     #  Config persistence
     # ──────────────────────────────────────────────
 
+    def _schedule_persist(self) -> None:
+        """Persist settings once the user stops toggling.
+
+        Each call re-arms a ``PERSIST_DEBOUNCE_SECONDS`` timer, so a burst of
+        language / mode taps costs one read-modify-write of config.json.
+        """
+        with self._persist_lock:
+            if self._persist_timer is not None:
+                self._persist_timer.cancel()
+            timer = threading.Timer(PERSIST_DEBOUNCE_SECONDS, self._flush_persist)
+            timer.daemon = True
+            self._persist_timer = timer
+            timer.start()
+
+    def _flush_persist(self) -> None:
+        """Write pending settings now (timer callback, and on stop).
+
+        No-op when nothing is pending or the settings are back to what was
+        last written (e.g. en → zh → en within the debounce window).  The
+        write stays under the lock, so comparing against and updating
+        ``_persisted_state`` cannot interleave with another flush.
+        """
+        with self._persist_lock:
+            if self._persist_timer is None:
+                return
+            self._persist_timer.cancel()
+            self._persist_timer = None
+            if self._state == self._persisted_state:
+                return
+            self._persist_ai_config()
+
     def _persist_ai_config(self) -> None:
-        """Write current runtime AI settings back to config.json."""
+        """Write current runtime AI settings back to config.json.
+
+        Written to a temp file and ``os.replace``d so a crash never leaves a
+        truncated config behind.  Caller holds ``_persist_lock``.
+        """
         try:
             if not self._config_path.exists():
                 logger.warning("Config file not found, skip persist: %s", self._config_path)
                 return
+            state = self._state
             raw = json.loads(self._config_path.read_text(encoding="utf-8"))
             ai = raw.setdefault("ai", {})
-            ai["language"] = self.language
-            ai["enabled"] = self.ai_enabled
-            ai["default_mode"] = self.mode.value
-            self._config_path.write_text(
-                json.dumps(raw, indent=2, ensure_ascii=False), encoding="utf-8"
-            )
+            ai["language"] = state.language
+            ai["enabled"] = state.ai_enabled
+            ai["default_mode"] = state.mode.value
+            tmp = self._config_path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(raw, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self._config_path)
+            self._persisted_state = state
             logger.info("AI config persisted: lang=%s mode=%s ai=%s",
-                        self.language, self.mode.value, self.ai_enabled)
+                        state.language, state.mode.value, state.ai_enabled)
         except Exception:
             logger.exception("Failed to persist AI config")
 
+    @property
+    def _offset_path(self) -> Path:
+        """Sidecar file next to config.json holding the last confirmed update offset."""
+        return self._config_path.with_suffix(".offset")
+
+    def _load_offset(self) -> int | None:
+        """Read the persisted update offset, or None if absent / unreadable."""
+        try:
+            return int(json.loads(self._offset_path.read_text(encoding="utf-8"))["offset"])
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Ignoring unreadable offset file: %s", self._offset_path)
+            return None
+
+    def _persist_offset(self, offset: int) -> None:
+        """Atomically write the update offset (temp file + os.replace)."""
+        tmp = self._offset_path.with_suffix(".offset.tmp")
+        try:
+            tmp.write_text(json.dumps({"offset": offset}), encoding="utf-8")
+            os.replace(tmp, self._offset_path)
+        except OSError:
+            logger.warning("Failed to persist update offset", exc_info=True)
+
     # ──────────────────────────────────────────────
     #  Lifecycle
     # ──────────────────────────────────────────────
@@ -196,6 +358,8 @@ class TelegramBotHandler:
             return
 
         self._register_commands()
+        if self._offset is None:
+            self._offset = self._load_offset()
 
         self._stop_event.clear()
         self._thread = threading.Thread(
@@ -204,15 +368,92 @@ class TelegramBotHandler:
             daemon=True,
         )
         self._thread.start()
-        logger.info("Telegram bot handler started (mode=%s, lang=%s)", self._mode.value, self._language)
+        self._start_ai_loop()
+        state = self._state
+        logger.info("Telegram bot handler started (mode=%s, lang=%s)", state.mode.value, state.language)
 
     def stop(self) -> None:
         """Stop the polling thread."""
         self._stop_event.set()
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=10)
+        self._stop_ai_loop()
+        self._flush_persist()
         logger.info("Telegram bot handler stopped")
 
+    def _start_ai_loop(self) -> None:
+        """Start the event loop thread that runs AI callback tasks."""
+        if self._ai_thread and self._ai_thread.is_alive():
+            return
+        loop = asyncio.new_event_loop()
+        self._ai_loop = loop
+        # Fresh per loop: an asyncio semaphore binds to the loop that first waits on it
+        self._ai_slots = asyncio.Semaphore(AI_TASK_CONCURRENCY)
+        self._ai_thread = threading.Thread(
+            target=loop.run_forever,
+            name="TelegramBot-AI",
+            daemon=True,
+        )
+        self._ai_thread.start()
+
+    def _stop_ai_loop(self) -> None:
+        """Stop the AI event loop; in-flight tasks are abandoned."""
+        loop, self._ai_loop = self._ai_loop, None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if self._ai_thread and self._ai_thread.is_alive():
+            self._ai_thread.join(timeout=10)
+        if not loop.is_running():
+            loop.close()
+
+    def _submit_ai_task(self, coro: Coroutine[Any, Any, None]) -> None:
+        """Schedule an AI callback coroutine without blocking the poller."""
+        loop = self._ai_loop
+        if loop is None:
+            # Handler not started (e.g. direct calls); run inline
+            asyncio.run(coro)
+            return
+
+        future = asyncio.run_coroutine_threadsafe(self._bounded(coro, self._ai_slots), loop)
+
+        def _log_failure(fut: Any) -> None:
+            if not fut.cancelled() and fut.exception() is not None:
+                logger.error("AI callback task failed", exc_info=fut.exception())
+
+        future.add_done_callback(_log_failure)
+
+    @staticmethod
+    async def _bounded(coro: Coroutine[Any, Any, None], slots: asyncio.Semaphore) -> None:
+        """Run ``coro`` once one of ``AI_TASK_CONCURRENCY`` slots is free.
+
+        Bursts of button presses queue here instead of all hitting the
+        provider (and its rate limits) at once.
+        """
+        async with slots:
+            await coro
+
+    def submit_ai(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """Schedule an AI coroutine on the AI loop and return its future at once.
+
+        Keeps litellm's pooled async client on the one long-lived loop
+        instead of a fresh ``asyncio.run`` loop per call.
+        """
+        loop = self._ai_loop
+        if loop is not None:
+            return asyncio.run_coroutine_threadsafe(coro, loop)
+        # Handler not started (e.g. direct calls); run inline
+        future: Future = Future()
+        try:
+            future.set_result(asyncio.run(coro))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def run_ai(self, coro: Coroutine[Any, Any, Any], timeout: float | None = None) -> Any:
+        """Run an AI coroutine on the AI loop and block until it returns."""
+        return self.submit_ai(coro).result(timeout)
+
     # ──────────────────────────────────────────────
     #  Polling loop
     # ──────────────────────────────────────────────
@@ -220,18 +461,30 @@ class TelegramBotHandler:
     def _poll_loop(self) -> None:
         """Long-polling loop for Telegram updates."""
         logger.info("Bot polling loop started")
+        backoff = 1.0
 
         while not self._stop_event.is_set():
             try:
                 updates = self._notifier.get_updates(
                     offset=self._offset,
                     timeout=30,
+                    limit=100,
                 )
+                if updates is None:
+                    # Request failed (outage, network); back off instead of retrying hot
+                    backoff = self._poll_backoff(backoff)
+                    continue
+                backoff = 1.0
+                if not updates:
+                    continue
+
+                # Advance and persist the offset for the whole batch before
+                # dispatching, so a crash mid-handle does not replay it on restart
+                self._offset = max(update.get("update_id", 0) for update in updates) + 1
+                self._persist_offset(self._offset)
 
                 for update in updates:
                     update_id = update.get("update_id", 0)
-                    self._offset = update_id + 1
-
                     try:
                         self._handle_update(update)
                     except Exception:
@@ -239,11 +492,17 @@ class TelegramBotHandler:
 
             except Exception:
                 logger.exception("Error in bot polling loop")
-                if not self._stop_event.is_set():
-                    time.sleep(5)
+                backoff = self._poll_backoff(backoff)
 
         logger.info("Bot polling loop exited")
 
+    def _poll_backoff(self, backoff: float) -> float:
+        """Sleep with jittered exponential backoff (interruptible by stop); return the next delay."""
+        delay = min(backoff, POLL_BACKOFF_MAX_SECONDS) + random.uniform(0, 1)
+        logger.debug("Bot polling backing off %.1f s", delay)
+        self._stop_event.wait(delay)
+        return min(backoff * 2, POLL_BACKOFF_MAX_SECONDS)
+
     def _register_commands(self) -> None:
         """Register bot commands with Telegram for native client help."""
         commands = [
@@ -361,23 +620,11 @@ class TelegramBotHandler:
                 "Use /rules add or /rules delete to manage."
             )
 
-        keyboard = {
-            "inline_keyboard": [
-                [
-                    {"text": "➕ Add", "callback_data": "rules_add"},
-                    {"text": "🗑 Delete", "callback_data": "rules_delete"},
-                ],
-                [
-                    {"text": "❌ Close", "callback_data": "rules_close"},
-                ],
-            ]
-        }
-
         self._notifier._api_call("sendMessage", {
             "chat_id": chat_id,
             "text": msg,
             "parse_mode": "HTML",
-            "reply_markup": json.dumps(keyboard),
+            "reply_markup": _RULES_KEYBOARD_JSON,
         })
 
     def _rules_add(self, chat_id: str, text: str) -> None:
@@ -394,8 +641,7 @@ class TelegramBotHandler:
         """Delete a rule by number from user's input."""
         text = text.strip()
         # Try to extract a number
-        import re
-        match = re.search(r"\d+", text)
+        match = _NUM_RE.search(text)
         if not match:
             self._notifier._api_call("sendMessage", {
                 "chat_id": chat_id,
@@ -449,18 +695,25 @@ class TelegramBotHandler:
         # Show typing status
         self._notifier.send_chat_action(chat_id)
 
-        # Build runtime config snapshot with current language
-        runtime_config = self._runtime_ai_config()
+        self._submit_ai_task(self._manual_analysis_task(reply_text, chat_id, reply_message_id))
 
-        result = analyze_email(
+    async def _manual_analysis_task(
+        self,
+        reply_text: str,
+        chat_id: str,
+        reply_message_id: int,
+    ) -> None:
+        """Run the /ai analysis on the AI loop and reply with the result."""
+        result = await analyze_email_async(
             subject="(Manual Analysis)",
             sender="",
             body=reply_text,
-            config=runtime_config,
+            config=self._runtime_ai_config(),
             rules_block=self.rules_block,
         )
 
-        self._notifier.send_ai_result(
+        await asyncio.to_thread(
+            self._notifier.send_ai_result,
             chat_id=chat_id,
             reply_to_message_id=reply_message_id,
             result=result,
@@ -470,21 +723,9 @@ class TelegramBotHandler:
 
     def _cmd_help(self, chat_id: str) -> None:
         """Send a short help message with available commands."""
-        lines = [
-            "🤖 <b>MailBot</b> commands:",
-            "",
-            "/settings — open settings dashboard",
-            "/rules — view / manage persona rules",
-            "/rules add — add a new rule",
-            "/rules delete — delete a rule",
-            "/ai — reply to a message to analyze with AI",
-            "/help — show this help",
-        ]
-        text = "\n".join(lines)
-
         self._notifier._api_call("sendMessage", {
             "chat_id": chat_id,
-            "text": text,
+            "text": _HELP_TEXT,
             "parse_mode": "HTML",
             "disable_web_page_preview": True,
         })
@@ -515,67 +756,64 @@ class TelegramBotHandler:
         if not data:
             return
 
-        # ── Settings navigation ──
-        if data == "settings_lang":
-            self._notifier.edit_settings_language_submenu(chat_id, message_id, self.language)
-            self._notifier.answer_callback_query(cq_id)
-        elif data == "settings_mode":
-            self._notifier.edit_settings_mode_submenu(chat_id, message_id, self.mode)
-            self._notifier.answer_callback_query(cq_id)
-        elif data == "settings_back":
-            self._notifier.edit_settings_main(
-                chat_id, message_id, self.mode, self.language,
-            )
-            self._notifier.answer_callback_query(cq_id)
-        elif data == "settings_close":
-            self._notifier.delete_message(chat_id, message_id)
-            self._notifier.answer_callback_query(cq_id, "Settings closed")
+        handler = self._exact_callbacks.get(data)
+        if handler is not None:
+            handler(cq_id, chat_id, message_id)
+            return
 
-        # ── Language selection ──
-        elif data.startswith("lang_"):
-            self._cb_language_switch(cq_id, data, chat_id, message_id)
+        prefix, _, _ = data.partition("_")
+        prefixed = self._prefix_callbacks.get(prefix)
+        if prefixed is not None:
+            prefixed(cq_id, data, chat_id, message_id)
+            return
 
-        # ── Mode selection ──
-        elif data.startswith("mode_"):
-            self._cb_mode_switch(cq_id, data, chat_id, message_id)
+        self._notifier.answer_callback_query(cq_id, "Unknown action")
 
-        # ── Hybrid AI summary ──
-        elif data.startswith("summ_"):
-            self._cb_summary(cq_id, data, chat_id, message_id)
+    # ── Settings navigation ──
 
-        # ── Hybrid show original ──
-        elif data.startswith("orig_"):
-            self._cb_show_original(cq_id, data, chat_id, message_id)
+    def _cb_settings_lang(self, cq_id: str, chat_id: str, message_id: int) -> None:
+        self._notifier.edit_settings_language_submenu(chat_id, message_id, self.language)
+        self._notifier.answer_callback_query(cq_id)
 
-        # ── Hybrid AI translation ──
-        elif data.startswith("trans_"):
-            self._cb_translate(cq_id, data, chat_id, message_id)
+    def _cb_settings_mode(self, cq_id: str, chat_id: str, message_id: int) -> None:
+        self._notifier.edit_settings_mode_submenu(chat_id, message_id, self.mode)
+        self._notifier.answer_callback_query(cq_id)
 
-        # ── Rules inline buttons ──
-        elif data == "rules_add":
-            with self._rules_lock:
-                self._rules_pending[chat_id] = "add"
-            self._notifier.answer_callback_query(cq_id, "Send me the rule text")
-            self._notifier._api_call("sendMessage", {
-                "chat_id": chat_id,
-                "text": "📝 Send me the rule text you want to add.",
-                "parse_mode": "HTML",
-            })
-        elif data == "rules_delete":
-            with self._rules_lock:
-                self._rules_pending[chat_id] = "delete"
-            self._notifier.answer_callback_query(cq_id, "Send a rule number to delete")
-            self._notifier._api_call("sendMessage", {
-                "chat_id": chat_id,
-                "text": "🗑 Send me the rule number to delete.",
-                "parse_mode": "HTML",
-            })
-        elif data == "rules_close":
-            self._notifier.delete_message(chat_id, message_id)
-            self._notifier.answer_callback_query(cq_id, "Rules closed")
+    def _cb_settings_back(self, cq_id: str, chat_id: str, message_id: int) -> None:
+        self._notifier.edit_settings_main(
+            chat_id, message_id, self.mode, self.language,
+        )
+        self._notifier.answer_callback_query(cq_id)
 
-        else:
-            self._notifier.answer_callback_query(cq_id, "Unknown action")
+    def _cb_settings_close(self, cq_id: str, chat_id: str, message_id: int) -> None:
+        self._notifier.delete_message(chat_id, message_id)
+        self._notifier.answer_callback_query(cq_id, "Settings closed")
+
+    # ── Rules inline buttons ──
+
+    def _cb_rules_add(self, cq_id: str, chat_id: str, message_id: int) -> None:
+        with self._rules_lock:
+            self._rules_pending[chat_id] = "add"
+        self._notifier.answer_callback_query(cq_id, "Send me the rule text")
+        self._notifier._api_call("sendMessage", {
+            "chat_id": chat_id,
+            "text": "📝 Send me the rule text you want to add.",
+            "parse_mode": "HTML",
+        })
+
+    def _cb_rules_delete(self, cq_id: str, chat_id: str, message_id: int) -> None:
+        with self._rules_lock:
+            self._rules_pending[chat_id] = "delete"
+        self._notifier.answer_callback_query(cq_id, "Send a rule number to delete")
+        self._notifier._api_call("sendMessage", {
+            "chat_id": chat_id,
+            "text": "🗑 Send me the rule number to delete.",
+            "parse_mode": "HTML",
+        })
+
+    def _cb_rules_close(self, cq_id: str, chat_id: str, message_id: int) -> None:
+        self._notifier.delete_message(chat_id, message_id)
+        self._notifier.answer_callback_query(cq_id, "Rules closed")
 
     # ──────────────────────────────────────────────
     #  Callback implementations
@@ -589,10 +827,9 @@ class TelegramBotHandler:
         message_id: int,
     ) -> None:
         """Handle language switch callback: lang_zh / lang_en / lang_ja / lang_auto."""
-        lang_code = data.replace("lang_", "")
+        lang_code = data.removeprefix("lang_")
 
         if lang_code == self.language:
-            from core.notifiers.telegram import LANGUAGE_LABELS
             self._notifier.answer_callback_query(
                 cq_id, f"Already set to {LANGUAGE_LABELS.get(lang_code, lang_code)}"
             )
@@ -600,13 +837,13 @@ class TelegramBotHandler:
 
         old = self.language
         self.language = lang_code
+        # The service manager reads the shared config for Agent-mode analysis
         self._ai_config.language = lang_code
         logger.info("Language switched: %s → %s", old, lang_code)
 
         # Persist to config.json
-        self._persist_ai_config()
+        self._schedule_persist()
 
-        from core.notifiers.telegram import LANGUAGE_LABELS
         label = LANGUAGE_LABELS.get(lang_code, lang_code)
         self._notifier.answer_callback_query(cq_id, f"✅ Language set to {label}")
 
@@ -623,7 +860,7 @@ class TelegramBotHandler:
         message_id: int,
     ) -> None:
         """Handle mode switch callback: mode_raw / mode_hybrid / mode_agent."""
-        mode_str = data.replace("mode_", "")
+        mode_str = data.removeprefix("mode_")
 
         try:
             new_mode = OperationMode(mode_str)
@@ -640,9 +877,8 @@ class TelegramBotHandler:
         logger.info("Mode switched: %s → %s", old_mode.value, new_mode.value)
 
         # Persist
-        self._persist_ai_config()
+        self._schedule_persist()
 
-        from core.notifiers.telegram import MODE_LABELS
         label = MODE_LABELS.get(new_mode, new_mode.value)
         self._notifier.answer_callback_query(cq_id, f"✅ Switched to {label}")
 
@@ -659,7 +895,7 @@ class TelegramBotHandler:
         message_id: int,
     ) -> None:
         """Handle hybrid mode AI summary callback: summ_{uid}."""
-        uid = data.replace("summ_", "")
+        uid = data.removeprefix("summ_")
 
         self._notifier.answer_callback_query(cq_id, "Generating AI summary…")
 
@@ -676,35 +912,61 @@ class TelegramBotHandler:
         # Show typing status
         self._notifier.send_chat_action(chat_id)
 
-        runtime_config = self._runtime_ai_config()
+        self._submit_ai_task(self._summary_task(snapshot, chat_id, message_id))
+
+    async def _summary_task(
+        self,
+        snapshot: EmailSnapshot,
+        chat_id: str,
+        message_id: int,
+    ) -> None:
+        """Run the AI summary on the AI loop and reply with the result.
+
+        The summary is streamed: it is posted as soon as it arrives and the
+        message is edited with category / priority / code once complete.
+        """
+        esc = TelegramNotifier._escape_html
+        reply_id: int | None = None
+
+        async def show_partial(summary: str) -> None:
+            nonlocal reply_id
+            data = await asyncio.to_thread(
+                self._notifier._api_call,
+                "sendMessage",
+                {
+                    "chat_id": chat_id,
+                    "text": f"🤖 <b>AI Summary</b>  ⏳\n💡 {esc(summary)}",
+                    "parse_mode": "HTML",
+                    "reply_to_message_id": message_id,
+                },
+            )
+            if data:
+                reply_id = data.get("result", {}).get("message_id")
 
-        result = analyze_email(
+        result = await analyze_email_stream(
             subject=snapshot.subject,
             sender=snapshot.sender,
             body=snapshot.body_text,
-            config=runtime_config,
+            config=self._runtime_ai_config(),
             rules_block=self.rules_block,
+            on_summary=show_partial,
         )
 
-        from core.notifiers.telegram import CATEGORY_ICONS, PRIORITY_LABELS
-
-        cat_icon = CATEGORY_ICONS.get(result.category, "📧")
-        pri_label = PRIORITY_LABELS.get(result.priority, "🟡 Medium")
-        esc = TelegramNotifier._escape_html
-
-        lines = [
-            f"🤖 <b>AI Summary</b>  {cat_icon} {esc(result.category)}  |  {pri_label}",
-            f"💡 {esc(result.summary)}",
-        ]
-        if result.extracted_code:
-            lines.append(f"🔑 Code: <code>{esc(result.extracted_code)}</code>")
+        cat_icon, pri_label = card_labels(result)
 
-        if snapshot.web_link:
-            lines.append(f"\n🔗 <a href=\"{snapshot.web_link}\">Open in webmail</a>")
+        code = f"\n🔑 Code: <code>{esc(result.extracted_code)}</code>" if result.extracted_code else ""
+        link = f"\n\n🔗 <a href=\"{snapshot.web_link}\">Open in webmail</a>" if snapshot.web_link else ""
+        text = (
+            f"🤖 <b>AI Summary</b>  {cat_icon} {esc(result.category)}  |  {pri_label}\n"
+            f"💡 {esc(result.summary)}{code}{link}"
+        )
 
-        text = "\n".join(lines)
+        if reply_id is not None:
+            await asyncio.to_thread(self._notifier.edit_message_text, chat_id, reply_id, text)
+            return
 
-        self._notifier._api_call(
+        await asyncio.to_thread(
+            self._notifier._api_call,
             "sendMessage",
             {
                 "chat_id": chat_id,
@@ -729,7 +991,7 @@ class TelegramBotHandler:
         
         Falls back gracefully if email cache has expired.
         """
-        uid = data.replace("trans_", "")
+        uid = data.removeprefix("trans_")
 
         self._notifier.answer_callback_query(cq_id, "Generating translation…")
 
@@ -746,33 +1008,31 @@ class TelegramBotHandler:
         # Show typing status
         self._notifier.send_chat_action(chat_id)
 
-        runtime_config = self._runtime_ai_config()
+        self._submit_ai_task(self._translate_task(snapshot, chat_id, message_id))
 
-        result = analyze_email(
+    async def _translate_task(
+        self,
+        snapshot: EmailSnapshot,
+        chat_id: str,
+        message_id: int,
+    ) -> None:
+        """Run the AI translation on the AI loop and reply with the result."""
+        result = await analyze_email_async(
             subject=snapshot.subject,
             sender=snapshot.sender,
             body=snapshot.body_text,
-            config=runtime_config,
+            config=self._runtime_ai_config(),
             rules_block=self.rules_block,
         )
 
         esc = TelegramNotifier._escape_html
 
-        lines = [
-            f"🌐 <b>Translation</b>",
-        ]
-        
-        if result.translation:
-            lines.append(f"{esc(result.translation)}")
-        else:
-            lines.append("⚠️ No translation available.")
-        
-        if snapshot.web_link:
-            lines.append(f"\n🔗 <a href=\"{snapshot.web_link}\">Open in webmail</a>")
-
-        text = "\n".join(lines)
+        body = esc(result.translation) if result.translation else "⚠️ No translation available."
+        link = f"\n\n🔗 <a href=\"{snapshot.web_link}\">Open in webmail</a>" if snapshot.web_link else ""
+        text = f"🌐 <b>Translation</b>\n{body}{link}"
 
-        self._notifier._api_call(
+        await asyncio.to_thread(
+            self._notifier._api_call,
             "sendMessage",
             {
                 "chat_id": chat_id,
@@ -790,7 +1050,7 @@ class TelegramBotHandler:
         message_id: int,
     ) -> None:
         """Handle hybrid mode show original email callback: orig_{uid}."""
-        uid = data.replace("orig_", "")
+        uid = data.removeprefix("orig_")
 
         self._notifier.answer_callback_query(cq_id, "Loading original email…")
 
@@ -804,22 +1064,15 @@ class TelegramBotHandler:
             )
             return
 
-        esc = TelegramNotifier._escape_html
-
-        lines = [
-            f"📧 <b>Original Email</b>",
-            f"👤 From: {esc(snapshot.sender)}",
-            f"📌 Subject: {esc(snapshot.subject)}",
-        ]
-        if snapshot.date:
-            lines.append(f"🕐 Date: {snapshot.date.strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        lines.append(f"\n📝 <b>Content:</b>\n{esc(snapshot.body_text)}")
-        
-        if snapshot.web_link:
-            lines.append(f"\n🔗 <a href=\"{snapshot.web_link}\">Open in webmail</a>")
-
-        text = "\n".join(lines)
+        fields = snapshot.html_fields
+        date = f"\n🕐 Date: {snapshot.date:%Y-%m-%d %H:%M:%S}" if snapshot.date else ""
+        link = f"\n\n🔗 <a href=\"{snapshot.web_link}\">Open in webmail</a>" if snapshot.web_link else ""
+        text = (
+            "📧 <b>Original Email</b>\n"
+            f"👤 From: {fields['sender']}\n"
+            f"📌 Subject: {fields['subject']}{date}\n"
+            f"\n📝 <b>Content:</b>\n{snapshot.escaped_body}{link}"
+        )
 
         self._notifier._api_call(
             "sendMessage",
@@ -836,8 +1089,12 @@ class TelegramBotHandler:
     # ──────────────────────────────────────────────
 
     def _runtime_ai_config(self) -> AIConfig:
-        """Return a snapshot of AI config reflecting current runtime state."""
-        # We mutate the shared config object safely — it's fine for single-writer
-        self._ai_config.language = self.language
-        self._ai_config.enabled = self.ai_enabled
-        return self._ai_config
+        """Return a snapshot of AI config reflecting current runtime state.
+
+        A shallow copy, so concurrent AI tasks never see the shared config
+        object change underneath them.
+        """
+        state = self._state
+        return self._ai_config.model_copy(
+            update={"language": state.language, "enabled": state.ai_enabled},
+        )
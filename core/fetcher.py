@@ -5,34 +5,68 @@ IMAP fetcher with exponential backoff and fail-fast auth handling.
 
 Responsibilities:
 - Connect to IMAP and fetch unread messages
-- Network errors: exponential backoff (5s → 10s → 30s)
+- Network errors: exponential backoff with full jitter (up to 5s → 10s → 20s → 30s)
 - Auth errors: fail fast and mark account as error
-- Track seen UIDs to avoid duplicate forwarding
+- Track seen UIDs (bounded, optionally persisted) to avoid duplicate forwarding
+- Keep one logged-in IMAP connection per account across polls
+- Optionally watch the first folder with IMAP IDLE to wake the poller early
 """
 
 from __future__ import annotations
 
 import logging
+import random
+import threading
 import time
-from datetime import datetime, timezone
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from typing import Callable
 
-from imap_tools import AND, MailBox, MailBoxUnencrypted, MailboxLoginError
+from imap_tools import AND, BaseMailBox, MailboxLoginError
 
+from core.imap_proxy import mailbox_factory
 from core.models import (
     AccountConfig,
     AccountState,
     AccountStatus,
     EmailSnapshot,
+    ProxyConfig,
 )
 from core.parser import parse_email
+from core.seen_store import SeenStore
 
 logger = logging.getLogger("mailbot.fetcher")
 
-# Backoff seconds for retries
-BACKOFF_BASE: list[int] = [5, 10, 30]
+# Retry backoff: full jitter over an exponential ceiling (5s, 10s, 20s, capped at 30s)
+BACKOFF_INITIAL = 5
+BACKOFF_MAX = 30
 MAX_RETRIES_DEFAULT = 3
 
+# Messages per UID FETCH command; larger requests trip server size limits
+FETCH_BATCH_SIZE_DEFAULT = 100
+# Newest unseen messages fetched per folder per poll (after bootstrap)
+FETCH_LIMIT = 50
+
+# Seen UIDs kept per account; the oldest are forgotten beyond this
+SEEN_MAX = 50_000
+
+# UID SEARCH criteria for unread mail, built once
+_UNSEEN_QUERY = AND(seen=False)
+# SINCE matches on the server's local date, so look back a day past the start
+SINCE_MARGIN = timedelta(days=1)
+
+# IDLE is re-issued this often (RFC 2177 asks for < 29 min); also bounds stop latency
+IDLE_TIMEOUT_SECONDS = 5 * 60
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Seconds to wait before retry ``attempt`` (0-based), uniformly jittered.
+
+    Accounts on the same provider that fail together then retry at spread-out
+    times instead of in lockstep.
+    """
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_INITIAL * 2 ** attempt))
+
 
 class EmailFetcher:
     """
@@ -47,7 +81,11 @@ class EmailFetcher:
     Args:
         account: account configuration
         max_retries: maximum retry attempts
+        fetch_batch_size: messages per bulk UID FETCH command
         on_status_change: optional status change callback
+        seen_store: optional persistent seen-UID store; folders with stored
+            UIDs skip the bootstrap pass after a restart
+        proxy: optional proxy the IMAP connection is tunnelled through
     """
 
     def __init__(
@@ -55,22 +93,38 @@ class EmailFetcher:
         account: AccountConfig,
         max_retries: int = MAX_RETRIES_DEFAULT,
         on_status_change: Callable[[AccountStatus], None] | None = None,
+        fetch_batch_size: int = FETCH_BATCH_SIZE_DEFAULT,
+        seen_store: SeenStore | None = None,
+        proxy: ProxyConfig | None = None,
     ) -> None:
         self._account = account
         self._max_retries = max_retries
+        self._fetch_batch_size = max(2, min(fetch_batch_size, FETCH_BATCH_SIZE_DEFAULT))
         self._on_status_change = on_status_change
+        self._seen_store = seen_store
 
         # Record service start to filter out pre-start mail by timestamp
         self._started_at = datetime.now(timezone.utc)
+        # After bootstrap the server drops older unread mail itself (IMAP SINCE)
+        self._recent_unseen_query = AND(seen=False, date_gte=(self._started_at - SINCE_MARGIN).date())
 
-        # Seen UID set to avoid duplicates
-        self._seen_uids: set[str] = set()
+        # Seen UIDs (as ints, oldest first) to avoid duplicates; capped at SEEN_MAX
+        self._seen_uids: OrderedDict[int, None] = OrderedDict()
 
         # Bootstrap flag: first poll only records existing unseen mail without sending
         self._bootstrap_done = False
 
-        # Runtime status
-        self._status = AccountStatus(
+        # Folder -> UIDVALIDITY whose stored UIDs were loaded from the seen store
+        self._folder_validity: dict[str, int] = {}
+
+        # Connection constructor picked once from the account's SSL setting and the proxy
+        self._mailbox_cls: Callable[..., BaseMailBox] = mailbox_factory(account.use_ssl, proxy)
+
+        # Logged-in connection reused across polls; None until first use or after an error
+        self._mailbox: BaseMailBox | None = None
+
+        # Runtime status; fields come from the already-validated AccountConfig
+        self._status = AccountStatus.model_construct(
             name=account.name,
             email=account.email,
             state=AccountState.IDLE,
@@ -93,8 +147,14 @@ class EmailFetcher:
         )
 
     def _update_status(self, **kwargs: object) -> None:
-        """Update cached status and fire callback if provided."""
-        self._status = self._status.model_copy(update=kwargs)
+        """Update the status in place and fire callback if provided.
+
+        AccountStatus is a mutable runtime model, so fields are assigned
+        directly instead of copying the model on every transition.
+        """
+        status = self._status
+        for field, value in kwargs.items():
+            setattr(status, field, value)
         if self._on_status_change:
             try:
                 self._on_status_change(self._status)
@@ -103,13 +163,13 @@ class EmailFetcher:
 
     def fetch_new_emails(
         self,
-        stop_check: Callable[[], bool] | None = None,
+        stop_event: threading.Event | None = None,
     ) -> list[EmailSnapshot]:
         """
         Fetch unread messages with retry logic.
 
         Args:
-            stop_check: optional stop predicate
+            stop_event: optional event; setting it aborts retries and backoff waits
 
         Returns:
             List of new EmailSnapshot
@@ -124,7 +184,7 @@ class EmailFetcher:
         self._update_status(state=AccountState.RUNNING, error_message="")
 
         for attempt in range(self._max_retries):
-            if stop_check and stop_check():
+            if stop_event and stop_event.is_set():
                 self._update_status(state=AccountState.IDLE)
                 return []
 
@@ -151,9 +211,9 @@ class EmailFetcher:
                 return []  # no retries on auth failure
 
             except (TimeoutError, OSError, ConnectionError) as e:
-                wait_time = BACKOFF_BASE[min(attempt, len(BACKOFF_BASE) - 1)]
+                wait_time = _backoff_delay(attempt)
                 logger.warning(
-                    "Account [%s] connection failed (attempt %d/%d), retry in %ds — %s",
+                    "Account [%s] connection failed (attempt %d/%d), retry in %.1fs — %s",
                     self._account.name,
                     attempt + 1,
                     self._max_retries,
@@ -166,11 +226,12 @@ class EmailFetcher:
                     retry_count=attempt + 1,
                 )
 
-                for _ in range(wait_time):
-                    if stop_check and stop_check():
-                        self._update_status(state=AccountState.IDLE)
-                        return []
-                    time.sleep(1)
+                # Event.wait returns as soon as stop is requested
+                if stop_event is None:
+                    time.sleep(wait_time)
+                elif stop_event.wait(wait_time):
+                    self._update_status(state=AccountState.IDLE)
+                    return []
 
             except Exception as e:
                 logger.exception(
@@ -195,80 +256,223 @@ class EmailFetcher:
         )
         return []
 
-    def _do_fetch(self) -> list[EmailSnapshot]:
-        """
-        Perform IMAP operations and return new snapshots.
+    def _get_mailbox(self) -> BaseMailBox:
+        """Return the live connection, logging in again if it is missing or stale.
+
+        A NOOP on the cached connection detects server-side idle drops before
+        the real work starts; TLS + LOGIN only happens on reconnect.
         """
-        snapshots: list[EmailSnapshot] = []
-        password = self._account.password.get_secret_value()
+        if self._mailbox is not None:
+            try:
+                self._mailbox.client.noop()
+                return self._mailbox
+            except Exception:
+                logger.debug("Account [%s] connection went stale, reconnecting", self._account.name)
+                self._drop_mailbox()
 
-        MailBoxCls = MailBox if self._account.use_ssl else MailBoxUnencrypted
+        mailbox = self._login()
+        logger.info("Connected [%s] (%s)", self._account.name, self._account.imap_host)
+        self._mailbox = mailbox
+        return mailbox
 
-        with MailBoxCls(
+    def _login(self) -> BaseMailBox:
+        """Open and authenticate a new IMAP connection for this account."""
+        return self._mailbox_cls(
             host=self._account.imap_host,
             port=self._account.imap_port,
         ).login(
             username=self._account.email,
-            password=password,
-        ) as mailbox:
-            logger.info("Connected [%s] (%s)", self._account.name, self._account.imap_host)
+            password=self._account.password.get_secret_value(),
+        )
 
-            # On first poll, pull all unseen to seed the seen-set so only post-start mail forwards
-            fetch_limit = None if not self._bootstrap_done else 50
+    def _drop_mailbox(self) -> None:
+        """Discard the cached connection without a LOGOUT round-trip (it may be dead)."""
+        mailbox, self._mailbox = self._mailbox, None
+        if mailbox is None:
+            return
+        try:
+            mailbox.client.shutdown()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Log out and release the cached IMAP connection."""
+        mailbox, self._mailbox = self._mailbox, None
+        if mailbox is None:
+            return
+        try:
+            mailbox.logout()
+        except Exception:
+            logger.debug("Account [%s] logout failed", self._account.name, exc_info=True)
+
+    def watch_idle(self, stop_event: threading.Event, on_new_mail: Callable[[], None]) -> None:
+        """
+        Block in IMAP IDLE on the first folder and call ``on_new_mail`` on new mail.
 
-            for folder in self._account.folders:
-                mailbox.folder.set(folder)
-                logger.debug("Scanning folder: [%s]/%s", self._account.name, folder)
+        Runs on its own connection (IDLE occupies it) until ``stop_event`` is set.
+        Returns at once if the server lacks the IDLE capability or rejects the
+        login; network errors reconnect with the usual backoff. Fetching itself
+        stays with ``fetch_new_emails`` — this only shortens the wait for it.
 
-                for msg in mailbox.fetch(AND(seen=False), limit=fetch_limit, reverse=True):
-                    uid = str(msg.uid)
+        Args:
+            stop_event: set to end the watch
+            on_new_mail: callback fired when the server reports EXISTS
+        """
+        attempt = 0
+        while not stop_event.is_set():
+            try:
+                with self._login() as mailbox:
+                    if "IDLE" not in mailbox.client.capabilities:
+                        logger.info("Account [%s] server has no IDLE, polling only", self._account.name)
+                        return
+                    mailbox.folder.set(self._account.folders[0])
+                    logger.info("Account [%s] watching %s with IDLE", self._account.name, self._account.folders[0])
+                    attempt = 0
+                    while not stop_event.is_set():
+                        responses = mailbox.idle.wait(timeout=IDLE_TIMEOUT_SECONDS)
+                        if any(b"EXISTS" in line for line in responses):
+                            on_new_mail()
+            except MailboxLoginError:
+                logger.warning("Account [%s] IDLE login failed, polling only", self._account.name)
+                return
+            except Exception as e:
+                wait_time = _backoff_delay(attempt)
+                attempt += 1
+                logger.warning(
+                    "Account [%s] IDLE connection lost, retry in %.1fs — %s",
+                    self._account.name,
+                    wait_time,
+                    str(e)[:100],
+                )
+                stop_event.wait(wait_time)
 
-                    if uid in self._seen_uids:
-                        continue
+    def _do_fetch(self) -> list[EmailSnapshot]:
+        """
+        Perform IMAP operations and return new snapshots.
+        """
+        snapshots: list[EmailSnapshot] = []
+        mailbox = self._get_mailbox()
+        started_at = self._started_at
+        normalize_dt = self._normalize_dt
 
-                    # First run: record existing unseen mail but do not forward
-                    if not self._bootstrap_done:
-                        self._seen_uids.add(uid)
-                        continue
+        try:
+            for folder in self._account.folders:
+                mailbox.folder.set(folder)
+                logger.debug("Scanning folder: [%s]/%s", self._account.name, folder)
 
-                    msg_dt = self._normalize_dt(msg.date)
-                    if msg_dt and msg_dt < self._started_at:
+                bootstrap = not self._bootstrap_done
+                uidvalidity = self._uidvalidity(mailbox)
+                if self._seen_store is not None and self._folder_validity.get(folder) != uidvalidity:
+                    stored = self._seen_store.load(self._account.name, folder, uidvalidity)
+                    self._folder_validity[folder] = uidvalidity
+                    for uid_int in stored[-SEEN_MAX:]:
+                        self._mark_seen(uid_int)
+                    # Known folder: resume where the last run stopped; new or
+                    # renumbered folder: record its unseen mail first
+                    bootstrap = not stored
+
+                # Two phases: one UID SEARCH, then bulk FETCH of only the new UIDs
+                unseen_uids = mailbox.uids(_UNSEEN_QUERY if bootstrap else self._recent_unseen_query)
+                marked: list[int] = []
+
+                # First run: record existing unseen mail but do not forward (no FETCH)
+                if bootstrap:
+                    marked = [self._mark_seen(uid) for uid in unseen_uids]
+                    self._persist_seen(folder, uidvalidity, marked)
+                    continue
+
+                new_uids = [uid for uid in unseen_uids if int(uid) not in self._seen_uids]
+                if not new_uids:
+                    continue
+
+                # Headers first (BODY.PEEK[HEADER], leaves \Seen untouched): mail
+                # dated before the service start is recorded without its body
+                wanted: list[str] = []
+                for msg in mailbox.fetch(
+                    uid_list=new_uids[-FETCH_LIMIT:],
+                    mark_seen=False,
+                    headers_only=True,
+                    bulk=self._fetch_batch_size,
+                ):
+                    msg_dt = normalize_dt(msg.date)
+                    if msg_dt and msg_dt < started_at:
                         # Skip pre-start mail based on timestamp; mark seen to avoid repeats
-                        self._seen_uids.add(uid)
-                        continue
-
+                        marked.append(self._mark_seen(msg.uid))
+                    else:
+                        wanted.append(msg.uid)
+                if not wanted:
+                    self._persist_seen(folder, uidvalidity, marked)
+                    continue
+
+                for msg in mailbox.fetch(
+                    uid_list=wanted,
+                    reverse=True,
+                    bulk=self._fetch_batch_size,
+                ):
+                    uid = str(msg.uid)
                     try:
                         snapshot = parse_email(msg, self._account)
                         snapshots.append(snapshot)
-                        self._seen_uids.add(uid)
+                        marked.append(self._mark_seen(uid))
                     except Exception:
                         logger.exception("Failed to parse mail: [%s] UID=%s", self._account.name, uid)
 
+                self._persist_seen(folder, uidvalidity, marked)
+        except Exception:
+            # Connection state is unknown after a failure; reconnect next time
+            self._drop_mailbox()
+            raise
+
         # Mark bootstrap complete after first poll
         if not self._bootstrap_done:
             self._bootstrap_done = True
 
+        # One status update (and callback) per poll
+        updates: dict[str, object] = {"last_check": datetime.now()}
         if snapshots:
             logger.info(
                 "Account [%s] fetched %d new emails",
                 self._account.name,
                 len(snapshots),
             )
-            self._update_status(
-                forwarded_count=self._status.forwarded_count + len(snapshots),
-            )
+            updates["forwarded_count"] = self._status.forwarded_count + len(snapshots)
         else:
             logger.debug("Account [%s] no new mail", self._account.name)
-
-        from datetime import datetime
-        self._update_status(last_check=datetime.now())
+        self._update_status(**updates)
 
         return snapshots
 
+    def _mark_seen(self, uid: str | int) -> int:
+        """Record ``uid`` as seen, evicting the oldest entry past SEEN_MAX."""
+        uid_int = int(uid)
+        self._seen_uids[uid_int] = None
+        self._seen_uids.move_to_end(uid_int)
+        if len(self._seen_uids) > SEEN_MAX:
+            self._seen_uids.popitem(last=False)
+        return uid_int
+
+    def _persist_seen(self, folder: str, uidvalidity: int, uids: list[int]) -> None:
+        """Write newly seen UIDs to the seen store; failures only cost a re-bootstrap."""
+        if self._seen_store is None or not uids:
+            return
+        try:
+            self._seen_store.add(self._account.name, folder, uidvalidity, uids)
+        except Exception:
+            logger.warning("Account [%s] failed to persist seen UIDs", self._account.name, exc_info=True)
+
+    @staticmethod
+    def _uidvalidity(mailbox: BaseMailBox) -> int:
+        """UIDVALIDITY reported by the last SELECT, or 0 if the server sent none."""
+        _, data = mailbox.client.response("UIDVALIDITY")
+        try:
+            return int(data[-1])
+        except (TypeError, ValueError, IndexError):
+            return 0
+
     def _normalize_dt(self, dt: datetime | None) -> datetime | None:
         """Return timezone-aware datetime or None."""
-        if dt is None:
-            return None
+        if dt is None or dt.tzinfo is timezone.utc:
+            return dt
         if dt.tzinfo is None:
             return dt.replace(tzinfo=timezone.utc)
         return dt.astimezone(timezone.utc)
@@ -287,4 +491,7 @@ class EmailFetcher:
         """Clear the cache of seen UIDs."""
         count = len(self._seen_uids)
         self._seen_uids.clear()
+        self._folder_validity.clear()
+        if self._seen_store is not None:
+            self._seen_store.clear(self._account.name)
         logger.info("Account [%s] cleared %d seen records", self._account.name, count)
@@ -0,0 +1,107 @@
+"""
+core/imap_proxy.py
+~~~~~~~~~~~~~~~~~~
+IMAP connections routed through the configured proxy.
+
+Only the IMAP socket is tunnelled (via PySocks); the process-wide
+``socket.socket`` is left alone, so HTTP clients (requests, httpx/litellm)
+keep using their own ``HTTP(S)_PROXY`` handling without double-proxying.
+"""
+
+from __future__ import annotations
+
+import functools
+import imaplib
+import socket
+import ssl
+from typing import Callable
+
+from imap_tools import BaseMailBox, MailBox, MailBoxUnencrypted
+
+from core.models import ProxyConfig
+
+
+def _open_proxy_socket(
+    proxy: ProxyConfig,
+    host: str,
+    port: int,
+    timeout: float | None,
+) -> socket.socket:
+    """Connect to ``host:port`` through ``proxy`` and return the tunnelled socket."""
+    import socks  # type: ignore
+
+    proxy_types = {"socks5": socks.SOCKS5, "socks4": socks.SOCKS4}
+    return socks.create_connection(
+        (host, port),
+        timeout=timeout,
+        proxy_type=proxy_types.get(proxy.scheme.lower(), socks.HTTP),
+        proxy_addr=proxy.host,
+        proxy_port=proxy.port,
+        proxy_username=proxy.username,
+        proxy_password=proxy.password.get_secret_value() if proxy.password else None,
+    )
+
+
+class _ProxyIMAP4(imaplib.IMAP4):
+    """Plain IMAP4 client whose socket goes through the proxy."""
+
+    def __init__(self, host: str, port: int, timeout: float | None, proxy: ProxyConfig) -> None:
+        # Set before IMAP4.__init__, which connects immediately
+        self._proxy = proxy
+        super().__init__(host, port, timeout)
+
+    def _create_socket(self, timeout: float | None) -> socket.socket:
+        return _open_proxy_socket(self._proxy, self.host, self.port, timeout)
+
+
+class _ProxyIMAP4SSL(imaplib.IMAP4_SSL):
+    """IMAP4 over TLS; the proxy tunnel is opened first, then wrapped in TLS."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        ssl_context: ssl.SSLContext | None,
+        timeout: float | None,
+        proxy: ProxyConfig,
+    ) -> None:
+        self._proxy = proxy
+        super().__init__(host, port, ssl_context=ssl_context, timeout=timeout)
+
+    def _create_socket(self, timeout: float | None) -> socket.socket:
+        sock = _open_proxy_socket(self._proxy, self.host, self.port, timeout)
+        return self.ssl_context.wrap_socket(sock, server_hostname=self.host)
+
+
+class ProxyMailBox(MailBox):
+    """``MailBox`` (IMAP over SSL) connecting through ``proxy``."""
+
+    def __init__(self, *args, proxy: ProxyConfig, **kwargs) -> None:
+        # Set before BaseMailBox.__init__, which opens the client
+        self._proxy = proxy
+        super().__init__(*args, **kwargs)
+
+    def _get_mailbox_client(self) -> imaplib.IMAP4:
+        return _ProxyIMAP4SSL(self._host, self._port, self._ssl_context, self._timeout, self._proxy)
+
+
+class ProxyMailBoxUnencrypted(MailBoxUnencrypted):
+    """``MailBoxUnencrypted`` connecting through ``proxy``."""
+
+    def __init__(self, *args, proxy: ProxyConfig, **kwargs) -> None:
+        self._proxy = proxy
+        super().__init__(*args, **kwargs)
+
+    def _get_mailbox_client(self) -> imaplib.IMAP4:
+        return _ProxyIMAP4(self._host, self._port, self._timeout, self._proxy)
+
+
+def mailbox_factory(use_ssl: bool, proxy: ProxyConfig | None) -> Callable[..., BaseMailBox]:
+    """Return the mailbox constructor for an account's SSL setting and the global proxy.
+
+    Without an enabled proxy this is plain ``MailBox`` / ``MailBoxUnencrypted``.
+    """
+    if proxy is None or not proxy.enabled:
+        return MailBox if use_ssl else MailBoxUnencrypted
+    cls = ProxyMailBox if use_ssl else ProxyMailBoxUnencrypted
+    return functools.partial(cls, proxy=proxy)
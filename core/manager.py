@@ -12,17 +12,21 @@ Responsibilities:
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import sqlite3
 import threading
-import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
 from datetime import datetime
-from typing import Callable
+from pathlib import Path
+from typing import Callable, Iterator
 
 from core.fetcher import EmailFetcher
 from core.models import (
     AccountConfig,
     AccountState,
     AccountStatus,
+    AIAnalysisResult,
     AIConfig,
     AppConfig,
     EmailSnapshot,
@@ -33,9 +37,18 @@ from core.models import (
 )
 from core.notifiers.base import BaseNotifier
 from core.notifiers.telegram import TelegramNotifier
+from core.seen_store import SEEN_DB_SUFFIX, SeenStore
 
 logger = logging.getLogger("mailbot.manager")
 
+# Upper bound on accounts fetched in parallel per poll cycle
+MAX_FETCH_WORKERS = 8
+
+# Upper bound on one Agent-mode batch analysis before falling back per email
+AI_BATCH_TIMEOUT = 120.0
+# LLM requests in flight per Agent-mode batch
+AI_BATCH_CONCURRENCY = 8
+
 
 class ServiceManager:
     """
@@ -49,6 +62,7 @@ class ServiceManager:
         config: AppConfig,
         on_status_change: Callable[[AccountStatus], None] | None = None,
         on_email_forwarded: Callable[[EmailSnapshot], None] | None = None,
+        config_path: Path = Path("config.json"),
     ) -> None:
         """
         Initialize ServiceManager with configuration and optional callbacks.
@@ -60,8 +74,11 @@ class ServiceManager:
             config: AppConfig containing accounts, notifiers, AI, and system settings.
             on_status_change: Optional callback invoked when account status changes.
             on_email_forwarded: Optional callback invoked after email is forwarded.
+            config_path: Path to config.json; the bot and the seen-UID store keep
+                their state files next to it.
         """
         self._config = config
+        self._config_path = config_path
         self._on_status_change = on_status_change
         self._on_email_forwarded = on_email_forwarded
 
@@ -72,14 +89,29 @@ class ServiceManager:
         # Thread control
         self._thread: threading.Thread | None = None
         self._stop_event = threading.Event()
+        # Per-account fetch workers, created on start()
+        self._fetch_pool: ThreadPoolExecutor | None = None
+
+        # IMAP IDLE watchers (opt-in): set _wake_event to poll before the interval ends.
+        # Watchers get their own stop event so a restart never revives old ones.
+        self._wake_event = threading.Event()
+        self._idle_stop = threading.Event()
 
         # Stats
         self._start_time: datetime | None = None
         self._total_forwarded: int = 0
         self._total_forwarded_lock = threading.Lock()
 
+        # Seen UIDs survive restarts here, so known folders skip the bootstrap pass
+        self._seen_store: SeenStore | None = None
+        try:
+            self._seen_store = SeenStore(config_path.with_suffix(SEEN_DB_SUFFIX))
+        except sqlite3.Error:
+            logger.warning("Seen-UID store unavailable, tracking in memory only", exc_info=True)
+
         # Components
         self._fetchers: list[EmailFetcher] = []
+        self._enabled_account_count = 0  # recomputed by _init_fetchers
         self._notifiers: list[BaseNotifier] = []
 
         # Bot handler (for Telegram commands/callbacks)
@@ -114,7 +146,7 @@ class ServiceManager:
 
     @property
     def account_count(self) -> int:
-        return len([f for f in self._fetchers if f.account.enabled])
+        return self._enabled_account_count
 
     @property
     def account_statuses(self) -> list[AccountStatus]:
@@ -148,15 +180,21 @@ class ServiceManager:
 
     def _init_fetchers(self) -> None:
         """Initialize fetchers from config."""
+        for fetcher in self._fetchers:
+            fetcher.close()
         self._fetchers.clear()
         for acc in self._config.accounts:
             fetcher = EmailFetcher(
                 account=acc,
                 max_retries=self._config.max_retries,
+                fetch_batch_size=self._config.fetch_batch_size,
                 on_status_change=self._on_status_change,
+                seen_store=self._seen_store,
+                proxy=self._config.proxy,
             )
             self._fetchers.append(fetcher)
             logger.info("Fetcher registered: [%s] %s", acc.name, acc.email)
+        self._enabled_account_count = sum(1 for f in self._fetchers if f.account.enabled)
 
     def _init_bot(self) -> None:
         """Initialize the Telegram bot handler for commands/callbacks."""
@@ -182,6 +220,7 @@ class ServiceManager:
             notifier=tg_notifier,
             ai_config=ai_config,
             default_mode=default_mode,
+            config_path=self._config_path,
         )
         logger.info("Bot handler initialized (default_mode=%s)", default_mode.value)
 
@@ -198,7 +237,12 @@ class ServiceManager:
             self._state = ServiceState.RUNNING
 
         self._stop_event.clear()
+        self._wake_event.clear()
         self._start_time = datetime.now()
+        self._fetch_pool = ThreadPoolExecutor(
+            max_workers=max(1, min(len(self._fetchers), MAX_FETCH_WORKERS)),
+            thread_name_prefix="MailBot-Fetch",
+        )
 
         self._thread = threading.Thread(
             target=self._main_loop,
@@ -206,6 +250,7 @@ class ServiceManager:
             daemon=True,
         )
         self._thread.start()
+        self._start_idle_watchers()
 
         # Start bot handler for commands/callbacks
         if self._bot_handler:
@@ -222,6 +267,8 @@ class ServiceManager:
 
         logger.info("Stopping MailBot service...")
         self._stop_event.set()
+        self._idle_stop.set()
+        self._wake_event.set()
 
         # Stop bot handler
         if self._bot_handler:
@@ -230,11 +277,38 @@ class ServiceManager:
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=30)
 
+        # Drop queued fetches and let running ones finish (their backoff waits
+        # end on _stop_event) before their connections are closed under them
+        if self._fetch_pool:
+            self._fetch_pool.shutdown(wait=True, cancel_futures=True)
+            self._fetch_pool = None
+
+        # Release the persistent IMAP connections
+        for fetcher in self._fetchers:
+            fetcher.close()
+        if self._seen_store is not None:
+            self._seen_store.close()
+
         with self._state_lock:
             self._state = ServiceState.STOPPED
 
         logger.info("MailBot service stopped")
 
+    def _start_idle_watchers(self) -> None:
+        """Spawn one IMAP IDLE watcher thread per enabled account (if use_idle)."""
+        self._idle_stop = threading.Event()
+        if not self._config.use_idle:
+            return
+        for fetcher in self._fetchers:
+            if not fetcher.account.enabled:
+                continue
+            threading.Thread(
+                target=fetcher.watch_idle,
+                args=(self._idle_stop, self._wake_event.set),
+                name=f"MailBot-IDLE-{fetcher.account.name}",
+                daemon=True,
+            ).start()
+
     def reload_config(self, config: AppConfig) -> None:
         """Reload configuration (service will restart if it was running)."""
         was_running = self.is_running
@@ -269,41 +343,161 @@ class ServiceManager:
             except Exception:
                 logger.exception("Unexpected error in main loop")
 
-            for _ in range(self._config.poll_interval):
-                if self._stop_event.is_set():
-                    break
-                time.sleep(1)
+            # Sleep until the next poll; IDLE watchers and stop() cut it short
+            self._wake_event.wait(self._config.poll_interval)
+            self._wake_event.clear()
 
         logger.info("Main loop exited")
 
     def _poll_cycle(self) -> None:
-        """One polling cycle."""
-        all_snapshots: list[EmailSnapshot] = []
+        """One polling cycle.
 
-        for fetcher in self._fetchers:
+        Accounts are fetched in parallel and each account's mail is dispatched
+        as soon as its fetch finishes, so a slow or retrying server does not
+        hold back the others.
+        """
+        pool = self._fetch_pool
+        if pool is None:
+            # Not started via start() (direct call); fetch sequentially
+            for fetcher in self._fetchers:
+                if self._stop_event.is_set():
+                    break
+                self._dispatch_batch(fetcher.fetch_new_emails(stop_event=self._stop_event))
+            return
+
+        futures = [
+            pool.submit(fetcher.fetch_new_emails, self._stop_event)
+            for fetcher in self._fetchers
+        ]
+        for future in as_completed(futures):
             if self._stop_event.is_set():
                 break
+            self._dispatch_batch(future.result())
 
-            snapshots = fetcher.fetch_new_emails(
-                stop_check=self._stop_event.is_set,
-            )
-            all_snapshots.extend(snapshots)
+    def _dispatch_batch(self, snapshots: list[EmailSnapshot]) -> None:
+        """Analyze (Agent mode) and forward the snapshots from one fetch."""
+        if not snapshots:
+            return
+
+        forwarded = 0
+        bot = self._bot_handler
+        if len(snapshots) > 1 and (not bot or bot.mode == OperationMode.RAW):
+            forwarded = self._dispatch_raw_batch(snapshots)
+        else:
+            for snapshot, ai_result in self._analyze_agent_batch(snapshots):
+                if self._stop_event.is_set():
+                    break
+                forwarded += self._dispatch_notification(snapshot, ai_result)
+
+        # One counter update per batch rather than per email
+        if forwarded:
+            with self._total_forwarded_lock:
+                self._total_forwarded += forwarded
+
+    def _dispatch_raw_batch(self, snapshots: list[EmailSnapshot]) -> int:
+        """Forward several emails in Raw mode, letting each notifier coalesce them.
+
+        Returns how many emails at least one notifier delivered.
+        """
+        if self._bot_handler:
+            # Cache for /ai replies, as _dispatch_notification does
+            for snapshot in snapshots:
+                self._bot_handler.cache_email(snapshot, None)
+
+        success_counts = [0] * len(snapshots)
+        for notifier in self._notifiers:
+            try:
+                results = notifier.send_many(snapshots)
+            except Exception:
+                logger.exception(
+                    "Notifier [%s] raised an exception on a batch of %d emails",
+                    notifier.name,
+                    len(snapshots),
+                )
+                continue
+            for i, (snapshot, ok) in enumerate(zip(snapshots, results)):
+                if ok:
+                    success_counts[i] += 1
+                else:
+                    logger.warning(
+                        "Notifier [%s] failed to send: %s",
+                        notifier.name,
+                        snapshot.subject[:50],
+                    )
+
+        for snapshot, success_count in zip(snapshots, success_counts):
+            if success_count > 0:
+                self._record_forwarded(snapshot, success_count)
+        return sum(1 for count in success_counts if count > 0)
 
-        if not all_snapshots:
+    def _analyze_agent_batch(
+        self,
+        snapshots: list[EmailSnapshot],
+    ) -> Iterator[tuple[EmailSnapshot, AIAnalysisResult | None]]:
+        """Pair each email with its Agent-mode analysis, yielding as each finishes.
+
+        All emails from one account fetch go out as concurrent requests on the
+        bot's AI loop, and each one is handed back for sending as soon as its
+        analysis returns, so notifications overlap the slower analyses.
+        Yields ``None`` analyses in input order when no batch was run (other
+        modes, or a single email), leaving the analysis to
+        ``_dispatch_notification``; the same goes for analyses that fail or
+        outlast ``AI_BATCH_TIMEOUT``.
+        """
+        bot = self._bot_handler
+        if not bot or bot.mode != OperationMode.AGENT or len(snapshots) < 2:
+            for snapshot in snapshots:
+                yield snapshot, None
             return
 
-        for snapshot in all_snapshots:
-            if self._stop_event.is_set():
-                break
-            self._dispatch_notification(snapshot)
+        from core.ai import analyze_email_async
+
+        slots = asyncio.Semaphore(AI_BATCH_CONCURRENCY)
+        rules_block = bot.rules_block
+        # One snapshot per batch; the live config may be edited while requests run
+        ai_config = self._config.ai.model_copy()
+
+        async def analyze(snapshot: EmailSnapshot) -> AIAnalysisResult:
+            async with slots:
+                return await analyze_email_async(
+                    snapshot.subject, snapshot.sender, snapshot.body_text, ai_config, rules_block,
+                )
+
+        pending = {bot.submit_ai(analyze(snapshot)): snapshot for snapshot in snapshots}
+        try:
+            for future in as_completed(list(pending), timeout=AI_BATCH_TIMEOUT):
+                snapshot = pending.pop(future)
+                try:
+                    ai_result = future.result()
+                except Exception:
+                    logger.exception("AI analysis failed, retrying per email: %s", snapshot.subject[:50])
+                    ai_result = None
+                yield snapshot, ai_result
+        except FutureTimeoutError:
+            logger.warning("Batch AI analysis timed out, %d emails fall back to per-email calls", len(pending))
+            for future, snapshot in list(pending.items()):
+                future.cancel()
+                del pending[future]
+                yield snapshot, None
+        finally:
+            # Dispatch stopped early (shutdown): drop analyses nobody will read
+            for future in pending:
+                future.cancel()
+
+    def _dispatch_notification(
+        self,
+        snapshot: EmailSnapshot,
+        ai_result: AIAnalysisResult | None = None,
+    ) -> bool:
+        """Send snapshots to all notifiers with mode-aware processing.
 
-    def _dispatch_notification(self, snapshot: EmailSnapshot) -> None:
-        """Send snapshots to all notifiers with mode-aware processing."""
+        Returns True if at least one notifier delivered the email; the caller
+        adds it to ``total_forwarded``.
+        """
         success_count = 0
 
         # Determine current mode and run AI if needed
         current_mode = OperationMode.RAW
-        ai_result = None
         source_language = None
 
         if self._bot_handler:
@@ -315,15 +509,16 @@ class ServiceManager:
             
             # Only Agent mode runs full AI upfront; Hybrid mode runs AI on-demand (button click)
             if current_mode == OperationMode.AGENT:
-                from core.ai import analyze_email
-                rules_block = self._bot_handler.rules_block if self._bot_handler else None
-                ai_result = analyze_email(
-                    subject=snapshot.subject,
-                    sender=snapshot.sender,
-                    body=snapshot.body_text,
-                    config=self._config.ai,
-                    rules_block=rules_block,
-                )
+                if ai_result is None:
+                    from core.ai import analyze_email
+                    rules_block = self._bot_handler.rules_block if self._bot_handler else None
+                    ai_result = analyze_email(
+                        subject=snapshot.subject,
+                        sender=snapshot.sender,
+                        body=snapshot.body_text,
+                        config=self._config.ai,
+                        rules_block=rules_block,
+                    )
                 source_language = ai_result.source_language if ai_result else None
             
             # Hybrid mode: detect language (heuristic only, no AI) for Translate button decision
@@ -376,20 +571,23 @@ class ServiceManager:
                 )
 
         if success_count > 0:
-            with self._total_forwarded_lock:
-                self._total_forwarded += 1
-            logger.info(
-                "Forwarded: [%s] %s (%d/%d notifiers)",
-                snapshot.account_name,
-                snapshot.subject[:50],
-                success_count,
-                len(self._notifiers),
-            )
-            if self._on_email_forwarded:
-                try:
-                    self._on_email_forwarded(snapshot)
-                except Exception:
-                    logger.debug("Forwarded callback failed", exc_info=True)
+            self._record_forwarded(snapshot, success_count)
+        return success_count > 0
+
+    def _record_forwarded(self, snapshot: EmailSnapshot, success_count: int) -> None:
+        """Log a delivered email and fire the forwarded callback."""
+        logger.info(
+            "Forwarded: [%s] %s (%d/%d notifiers)",
+            snapshot.account_name,
+            snapshot.subject[:50],
+            success_count,
+            len(self._notifiers),
+        )
+        if self._on_email_forwarded:
+            try:
+                self._on_email_forwarded(snapshot)
+            except Exception:
+                logger.debug("Forwarded callback failed", exc_info=True)
 
     # ──────────────────────────────────────────────
     #  Uptime helpers
@@ -13,13 +13,13 @@ Includes:
 
 from __future__ import annotations
 
-import json
+import html
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any
 
-from pydantic import BaseModel, Field, SecretStr, field_validator
+from pydantic import BaseModel, Field, SecretStr, field_serializer, field_validator
 
 
 # ──────────────────────────────────────────────
@@ -65,6 +65,11 @@ class AccountConfig(BaseModel):
     enabled: bool = Field(default=True, description="Whether this account is enabled")
     web_url: str = Field(default="", description="Optional webmail base URL for links")
 
+    @field_serializer("password", when_used="json-unless-none")
+    def serialize_password(self, v: SecretStr) -> str:
+        # config.json stores secrets in plain text
+        return v.get_secret_value()
+
     @field_validator("imap_port")
     @classmethod
     def validate_port(cls, v: int) -> int:
@@ -83,6 +88,11 @@ class TelegramNotifierConfig(BaseModel):
     )
     timeout: int = Field(default=30, description="HTTP timeout in seconds")
 
+    @field_serializer("bot_token", when_used="json-unless-none")
+    def serialize_bot_token(self, v: SecretStr) -> str:
+        # config.json stores secrets in plain text
+        return v.get_secret_value()
+
 
 class ProxyConfig(BaseModel):
     """Global proxy configuration for both IMAP and HTTP requests."""
@@ -94,6 +104,11 @@ class ProxyConfig(BaseModel):
     username: str | None = Field(default=None, description="Proxy username (optional)")
     password: SecretStr | None = Field(default=None, description="Proxy password (optional)")
 
+    @field_serializer("password", when_used="json-unless-none")
+    def serialize_password(self, v: SecretStr) -> str:
+        # config.json stores secrets in plain text
+        return v.get_secret_value()
+
     @field_validator("port")
     @classmethod
     def validate_port(cls, v: int) -> int:
@@ -137,6 +152,33 @@ class AIConfig(BaseModel):
         default="auto",
         description="Output language: zh / en / ja / auto (detect from email)",
     )
+    semantic_cache_enabled: bool = Field(
+        default=False,
+        description="Reuse AI results for near-duplicate emails (digits/whitespace ignored)",
+    )
+    semantic_cache_embedding_model: str | None = Field(
+        default=None,
+        description="litellm embedding model for similarity matching (requires semantic_cache_enabled)",
+    )
+    semantic_cache_threshold: float = Field(
+        default=0.95,
+        ge=0.0,
+        le=1.0,
+        description="Minimum cosine similarity to reuse a cached result",
+    )
+    local_code_extraction: bool = Field(
+        default=False,
+        description="Classify short verification-code emails locally without calling the LLM",
+    )
+    result_cache_path: str | None = Field(
+        default=None,
+        description="SQLite file persisting exact-match AI results across restarts (None = memory only)",
+    )
+
+    @field_serializer("api_key", when_used="json-unless-none")
+    def serialize_api_key(self, v: SecretStr) -> str:
+        # config.json stores secrets in plain text
+        return v.get_secret_value()
 
 
 class NotifierConfig(BaseModel):
@@ -162,6 +204,16 @@ class AppConfig(BaseModel):
         description="Polling interval in seconds (min 10)",
     )
     max_retries: int = Field(default=3, ge=1, description="Max retry attempts for network errors")
+    fetch_batch_size: int = Field(
+        default=100,
+        ge=2,
+        le=100,
+        description="Messages per IMAP UID FETCH command (capped to stay under server request limits)",
+    )
+    use_idle: bool = Field(
+        default=False,
+        description="Watch each account with IMAP IDLE and poll as soon as new mail arrives",
+    )
     log_level: str = Field(default="INFO", description="Log level: DEBUG/INFO/WARNING/ERROR")
     accounts: list[AccountConfig] = Field(default_factory=list, description="IMAP accounts")
     notifiers: list[NotifierConfig] = Field(default_factory=list, description="Notifiers list")
@@ -182,51 +234,57 @@ class AppConfig(BaseModel):
         config_path = Path(path)
         if not config_path.exists():
             raise FileNotFoundError(f"Config file not found: {config_path}")
-        raw: dict[str, Any] = json.loads(config_path.read_text(encoding="utf-8"))
-        return cls.model_validate(raw)
+        # Parsed and validated in one pass by pydantic-core, no intermediate dict
+        return cls.model_validate_json(config_path.read_bytes())
 
     def save(self, path: str | Path) -> None:
         """Persist configuration to a JSON file."""
         config_path = Path(path)
-        data = self.model_dump(mode="python")
-        # Ensure secrets are stored as plain strings
-        for acc in data.get("accounts", []):
-            pwd = acc.get("password")
-            if isinstance(pwd, SecretStr):
-                acc["password"] = pwd.get_secret_value()
-        for notifier in data.get("notifiers", []):
-            tg = notifier.get("telegram")
-            if tg and isinstance(tg.get("bot_token"), SecretStr):
-                tg["bot_token"] = tg["bot_token"].get_secret_value()
-        proxy = data.get("proxy")
-        if proxy and isinstance(proxy.get("password"), SecretStr):
-            proxy["password"] = proxy["password"].get_secret_value()
-        ai = data.get("ai")
-        if ai and isinstance(ai.get("api_key"), SecretStr):
-            ai["api_key"] = ai["api_key"].get_secret_value()
-        config_path.write_text(
-            json.dumps(data, indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
+        # Secret fields serialize to plain strings (see the field_serializer hooks)
+        config_path.write_text(self.model_dump_json(indent=2), encoding="utf-8")
 
 
 # ──────────────────────────────────────────────
 #  Runtime models
 # ──────────────────────────────────────────────
 
-class EmailSnapshot(BaseModel):
-    """Immutable snapshot of a fetched email."""
-    uid: str = Field(..., description="Email UID")
-    account_name: str = Field(..., description="Account display name")
-    subject: str = Field(default="(No subject)", description="Email subject")
-    sender: str = Field(default="", description="From header")
-    date: datetime | None = Field(default=None, description="Email date")
-    body_text: str = Field(default="", description="Cleaned plain text body")
-    body_html: str = Field(default="", description="Original HTML body")
-    web_link: str = Field(default="", description="Webmail link")
-
-    class Config:
-        frozen = True  # snapshots should be immutable
+@dataclass(frozen=True, slots=True)
+class EmailSnapshot:
+    """Immutable snapshot of a fetched email.
+
+    A plain frozen dataclass rather than a pydantic model: snapshots are only
+    built internally by the parser, so there is nothing to validate. Slots keep
+    instances free of a per-object ``__dict__``; the escaped views are cached
+    in two extra slots on first use.
+    """
+    uid: str  # Email UID
+    account_name: str  # Account display name
+    subject: str = "(No subject)"  # Email subject
+    sender: str = ""  # From header
+    date: datetime | None = None  # Email date
+    body_text: str = ""  # Cleaned plain text body
+    body_html: str = ""  # Original HTML body
+    web_link: str = ""  # Webmail link
+    _html_fields: dict[str, str] | None = field(default=None, init=False, repr=False, compare=False)
+    _escaped_body: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def html_fields(self) -> dict[str, str]:
+        """Header fields escaped for Telegram parse_mode=HTML, computed once."""
+        if self._html_fields is None:
+            object.__setattr__(self, "_html_fields", {
+                "account_name": html.escape(self.account_name, quote=False),
+                "sender": html.escape(self.sender, quote=False),
+                "subject": html.escape(self.subject, quote=False),
+            })
+        return self._html_fields
+
+    @property
+    def escaped_body(self) -> str:
+        """``body_text`` escaped for Telegram HTML, computed on first use only."""
+        if self._escaped_body is None:
+            object.__setattr__(self, "_escaped_body", html.escape(self.body_text, quote=False))
+        return self._escaped_body
 
 
 class AIAnalysisResult(BaseModel):
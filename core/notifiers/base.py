@@ -31,27 +31,27 @@ class BaseNotifier(ABC):
         """Send a notification for the snapshot. Return True on success."""
         ...
 
+    def send_many(self, snapshots: list[EmailSnapshot]) -> list[bool]:
+        """Send plain notifications for several snapshots, one result per snapshot.
+
+        Adapters that can coalesce messages override this; the default sends
+        them one by one.
+        """
+        return [self.send(snapshot) for snapshot in snapshots]
+
     def format_message(self, snapshot: EmailSnapshot) -> str:
         """Default message template (override in subclasses if needed)."""
-        lines = [
-            "📬 New mail",
-            f"",
-            f"📧 Account: {snapshot.account_name}",
-            f"👤 From: {snapshot.sender}",
-            f"📌 Subject: {snapshot.subject}",
-        ]
-        if snapshot.date:
-            lines.append(f"🕐 Time: {snapshot.date.strftime('%Y-%m-%d %H:%M')}")
-        if snapshot.body_text:
-            preview = snapshot.body_text[:50]
-            if len(snapshot.body_text) > 50:
-                preview += "..."
-            lines.append(f"")
-            lines.append(f"📝 Preview:\n{preview}")
-        if snapshot.web_link:
-            lines.append(f"")
-            lines.append(f"🔗 Open in webmail: {snapshot.web_link}")
-        return "\n".join(lines)
+        body = snapshot.body_text
+        time_line = f"\n🕐 Time: {snapshot.date.strftime('%Y-%m-%d %H:%M')}" if snapshot.date else ""
+        preview = f"\n\n📝 Preview:\n{body[:50]}{'...' if len(body) > 50 else ''}" if body else ""
+        link = f"\n\n🔗 Open in webmail: {snapshot.web_link}" if snapshot.web_link else ""
+        return (
+            "📬 New mail\n\n"
+            f"📧 Account: {snapshot.account_name}\n"
+            f"👤 From: {snapshot.sender}\n"
+            f"📌 Subject: {snapshot.subject}"
+            f"{time_line}{preview}{link}"
+        )
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} name={self.name!r}>"
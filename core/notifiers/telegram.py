@@ -13,11 +13,14 @@ Supports:
 
 from __future__ import annotations
 
+import json
 import logging
 import re
+from functools import cached_property
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from core.models import (
     AIAnalysisResult,
@@ -27,8 +30,35 @@ from core.models import (
 )
 from core.notifiers.base import BaseNotifier
 
+try:  # optional fast JSON parser for API responses (getUpdates batches can be large)
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover - fallback when orjson is not installed
+    _json_loads = json.loads
+
 logger = logging.getLogger("mailbot.notifier.telegram")
 
+# Keep-alive pool sizes for each notifier's session (hosts / conns per host)
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+
+
+def _build_session() -> requests.Session:
+    """Create a pooled session for one TelegramNotifier."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
+# Telegram rejects longer messages (counted in UTF-16 code units)
+MESSAGE_MAX_CHARS = 4096
+# Placed between notifications coalesced into one message by send_many
+BATCH_SEPARATOR = "\n\n━━━━━━━━━━\n\n"
+
 # Priority label mapping
 PRIORITY_LABELS = {1: "🔴 Urgent", 2: "🟠 High", 3: "🟡 Medium", 4: "🔵 Low", 5: "⚪ Lowest"}
 CATEGORY_ICONS = {
@@ -38,6 +68,13 @@ CATEGORY_ICONS = {
     "promotion": "📣",
     "personal": "✉️",
 }
+# Priority is validated to 1-5, so labels are indexed directly (priority - 1)
+_PRIORITY_BY_INDEX: tuple[str, ...] = tuple(PRIORITY_LABELS[p] for p in range(1, 6))
+
+
+def card_labels(result: AIAnalysisResult) -> tuple[str, str]:
+    """Return the (category icon, priority label) pair shown on AI result cards."""
+    return CATEGORY_ICONS.get(result.category, "📧"), _PRIORITY_BY_INDEX[result.priority - 1]
 
 # Language display metadata
 LANGUAGE_OPTIONS: list[tuple[str, str, str]] = [
@@ -56,20 +93,42 @@ MODE_LABELS: dict[OperationMode, str] = {
 }
 
 
+def _build_mode_submenu(current_mode: OperationMode) -> tuple[str, dict]:
+    """Text and inline keyboard of the mode sub-menu with ``current_mode`` ticked."""
+    current_label = MODE_LABELS.get(current_mode, current_mode.value)
+    text = (
+        "⚙️ <b>Operation Mode</b>\n\n"
+        f"Current: ✅ <b>{current_label}</b>\n\n"
+        "Select mode:"
+    )
+
+    buttons: list[list[dict]] = []
+    for m, label in MODE_LABELS.items():
+        display = f"✅ {label}" if m == current_mode else label
+        buttons.append([{"text": display, "callback_data": f"mode_{m.value}"}])
+
+    buttons.append([{"text": "🔙 Back", "callback_data": "settings_back"}])
+    return text, {"inline_keyboard": buttons}
+
+
+# One prebuilt (text, keyboard) per mode; the sub-menu depends on nothing else
+_MODE_SUBMENUS: dict[OperationMode, tuple[str, dict]] = {m: _build_mode_submenu(m) for m in OperationMode}
+
+
 class TelegramNotifier(BaseNotifier):
     """Telegram Bot notifier using the sendMessage endpoint."""
 
     def __init__(self, config: TelegramNotifierConfig) -> None:
         self._config = config
-        self._session = requests.Session()
-        self._session.headers.update({"Content-Type": "application/json"})
+        self._session = _build_session()
 
     @property
     def name(self) -> str:
         return "Telegram"
 
-    @property
+    @cached_property
     def _api_url(self) -> str:
+        """Bot API base URL; the token is fixed for the notifier's lifetime."""
         token = self._config.bot_token.get_secret_value()
         return f"{self._config.api_base}/bot{token}"
 
@@ -82,6 +141,31 @@ class TelegramNotifier(BaseNotifier):
         message_text = self.format_message(snapshot)
         return self._send_text(message_text)
 
+    def send_many(self, snapshots: list[EmailSnapshot]) -> list[bool]:
+        """Send plain (raw mode) notifications packed into as few messages as fit.
+
+        Consecutive notifications are joined with ``BATCH_SEPARATOR`` up to
+        ``MESSAGE_MAX_CHARS``, so a burst costs a few requests instead of one
+        per email and stays clear of Telegram's per-chat rate limit. Every
+        snapshot in a message shares that message's result.
+        """
+        texts = [self.format_message(snapshot) for snapshot in snapshots]
+        sizes = [len(text.encode("utf-16-le")) // 2 for text in texts]
+        sep_size = len(BATCH_SEPARATOR.encode("utf-16-le")) // 2
+
+        results: list[bool] = []
+        start = 0
+        while start < len(texts):
+            end = start + 1
+            size = sizes[start]
+            while end < len(texts) and size + sep_size + sizes[end] <= MESSAGE_MAX_CHARS:
+                size += sep_size + sizes[end]
+                end += 1
+            ok = self._send_text(BATCH_SEPARATOR.join(texts[start:end]))
+            results.extend([ok] * (end - start))
+            start = end
+        return results
+
     def send_with_mode(
         self,
         snapshot: EmailSnapshot,
@@ -151,11 +235,12 @@ class TelegramNotifier(BaseNotifier):
         if len(body) > 50:
             preview += "…"
 
+        fields = snapshot.html_fields
         lines = [
             "📬 <b>New mail</b>",
-            f"📧 Account: {self._escape_html(snapshot.account_name)}",
-            f"👤 From: {self._escape_html(snapshot.sender)}",
-            f"📌 Subject: {self._escape_html(snapshot.subject)}",
+            f"📧 Account: {fields['account_name']}",
+            f"👤 From: {fields['sender']}",
+            f"📌 Subject: {fields['subject']}",
         ]
         if snapshot.date:
             lines.append(f"🕐 Time: {snapshot.date.strftime('%Y-%m-%d %H:%M')}")
@@ -189,14 +274,13 @@ class TelegramNotifier(BaseNotifier):
         result: AIAnalysisResult,
     ) -> bool:
         """Send structured AI analysis card (with optional translation)."""
-        cat_icon = CATEGORY_ICONS.get(result.category, "📧")
-        pri_label = PRIORITY_LABELS.get(result.priority, "🟡 Medium")
+        cat_icon, pri_label = card_labels(result)
 
         lines = [
             f"{cat_icon} <b>{self._escape_html(result.category)}</b>  |  {pri_label}",
             "",
-            f"📌 <b>{self._escape_html(snapshot.subject)}</b>",
-            f"👤 {self._escape_html(snapshot.sender)}",
+            f"📌 <b>{snapshot.html_fields['subject']}</b>",
+            f"👤 {snapshot.html_fields['sender']}",
         ]
         if snapshot.date:
             lines.append(f"🕐 {snapshot.date.strftime('%Y-%m-%d %H:%M')}")
@@ -239,8 +323,7 @@ class TelegramNotifier(BaseNotifier):
         Returns:
             True if successful, False otherwise.
         """
-        cat_icon = CATEGORY_ICONS.get(result.category, "📧")
-        pri_label = PRIORITY_LABELS.get(result.priority, "🟡 Medium")
+        cat_icon, pri_label = card_labels(result)
 
         lines = [
             f"🤖 <b>AI Summary</b>  {cat_icon} {self._escape_html(result.category)}  |  {pri_label}",
@@ -406,20 +489,7 @@ class TelegramNotifier(BaseNotifier):
         current_mode: OperationMode,
     ) -> bool:
         """Edit message in-place to show the mode selection sub-menu."""
-        current_label = MODE_LABELS.get(current_mode, current_mode.value)
-        text = (
-            "⚙️ <b>Operation Mode</b>\n\n"
-            f"Current: ✅ <b>{current_label}</b>\n\n"
-            "Select mode:"
-        )
-
-        buttons: list[list[dict]] = []
-        for m, label in MODE_LABELS.items():
-            display = f"✅ {label}" if m == current_mode else label
-            buttons.append([{"text": display, "callback_data": f"mode_{m.value}"}])
-
-        buttons.append([{"text": "🔙 Back", "callback_data": "settings_back"}])
-        keyboard = {"inline_keyboard": buttons}
+        text, keyboard = _MODE_SUBMENUS[current_mode]
 
         payload: dict[str, Any] = {
             "chat_id": chat_id,
@@ -499,8 +569,7 @@ class TelegramNotifier(BaseNotifier):
         result: AIAnalysisResult,
     ) -> bool:
         """Send AI analysis result as a reply to a message."""
-        cat_icon = CATEGORY_ICONS.get(result.category, "📧")
-        pri_label = PRIORITY_LABELS.get(result.priority, "🟡 Medium")
+        cat_icon, pri_label = card_labels(result)
 
         lines = [
             f"🤖 <b>AI Analysis</b>",
@@ -555,17 +624,31 @@ class TelegramNotifier(BaseNotifier):
     #  Bot update polling
     # ──────────────────────────────────────────────
 
-    def get_updates(self, offset: int | None = None, timeout: int = 30) -> list[dict]:
-        """Long-poll for new updates from the Bot API."""
+    def get_updates(
+        self,
+        offset: int | None = None,
+        timeout: int = 30,
+        limit: int = 100,
+    ) -> list[dict] | None:
+        """Long-poll for new updates from the Bot API.
+
+        Returns None when the request itself failed, so callers can tell an
+        outage apart from an idle poll (empty list).
+        """
         payload: dict[str, Any] = {
             "timeout": timeout,
+            "limit": limit,
             "allowed_updates": ["message", "callback_query"],
         }
         if offset is not None:
             payload["offset"] = offset
 
-        result = self._api_call("getUpdates", payload)
-        if result and isinstance(result.get("result"), list):
+        # The HTTP timeout must outlast the server-side long poll, otherwise an
+        # idle poll is cut off client-side and the connection is torn down
+        result = self._api_call("getUpdates", payload, http_timeout=timeout + self._config.timeout)
+        if result is None:
+            return None
+        if isinstance(result.get("result"), list):
             return result["result"]
         return []
 
@@ -615,22 +698,30 @@ class TelegramNotifier(BaseNotifier):
         result = self._api_call("sendMessage", payload)
         return result is not None
 
-    def _api_call(self, method: str, payload: dict[str, Any]) -> dict | None:
+    def _api_call(
+        self,
+        method: str,
+        payload: dict[str, Any],
+        http_timeout: float | None = None,
+    ) -> dict | None:
         """
         Make a Telegram Bot API call.
 
+        ``http_timeout`` overrides the configured timeout (long polls need more).
         Returns the full response dict on success, None on failure.
         """
         url = f"{self._api_url}/{method}"
+        if http_timeout is None:
+            http_timeout = self._config.timeout
 
         try:
             response = self._session.post(
                 url,
                 json=payload,
-                timeout=self._config.timeout,
+                timeout=http_timeout,
             )
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 if data.get("ok"):
                     return data
                 logger.error("Telegram API error [%s]: %s", method, data.get("description", "Unknown"))
@@ -639,7 +730,7 @@ class TelegramNotifier(BaseNotifier):
                 logger.error("Telegram auth failed (401), check bot token")
                 return None
             elif response.status_code == 429:
-                retry_after = response.json().get("parameters", {}).get("retry_after", 30)
+                retry_after = _json_loads(response.content).get("parameters", {}).get("retry_after", 30)
                 logger.warning("Telegram rate limited, wait %d seconds", retry_after)
                 return None
             else:
@@ -652,7 +743,7 @@ class TelegramNotifier(BaseNotifier):
                 return None
 
         except requests.exceptions.Timeout:
-            logger.warning("Telegram [%s] timed out (%d s)", method, self._config.timeout)
+            logger.warning("Telegram [%s] timed out (%d s)", method, http_timeout)
             return None
         except requests.exceptions.ConnectionError:
             logger.warning("Telegram [%s] connection failed", method)
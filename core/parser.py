@@ -134,6 +134,10 @@ def parse_email(
     if not body_text and body_html:
         body_text = clean_html(body_html)
 
+    # Normalize CRLF once here so every consumer (AI prompt, Telegram) sees \n
+    if "\r" in body_text:
+        body_text = body_text.replace("\r\n", "\n").replace("\r", "\n")
+
     web_link = generate_web_link(account, str(msg.uid))
 
     snapshot = EmailSnapshot(
@@ -17,6 +17,9 @@ logger = logging.getLogger("mailbot.rules")
 
 DEFAULT_RULES_PATH = Path("rules.md")
 
+# Leading list numbering: "1. some text" → "some text"
+_NUMBERING_RE = re.compile(r"^\d+\.\s*")
+
 
 class RulesManager:
     """
@@ -48,7 +51,7 @@ class RulesManager:
         rules: list[str] = []
         for line in lines:
             # Strip leading number + dot: "1. some text" → "some text"
-            cleaned = re.sub(r"^\d+\.\s*", "", line.strip())
+            cleaned = _NUMBERING_RE.sub("", line.strip())
             if cleaned:
                 rules.append(cleaned)
         return rules
@@ -0,0 +1,110 @@
+"""
+core/seen_store.py
+~~~~~~~~~~~~~~~~~~
+SQLite-backed record of seen IMAP UIDs, shared by all fetchers.
+
+Rows are keyed by (account, folder, UIDVALIDITY): when the server changes a
+folder's UIDVALIDITY its old UIDs are meaningless, so they are dropped.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable
+
+logger = logging.getLogger("mailbot.seen_store")
+
+# Database file sits next to the config file: config.json -> config.seen.db
+SEEN_DB_SUFFIX = ".seen.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    account     TEXT    NOT NULL,
+    folder      TEXT    NOT NULL,
+    uidvalidity INTEGER NOT NULL,
+    uid         INTEGER NOT NULL,
+    PRIMARY KEY (account, folder, uidvalidity, uid)
+) WITHOUT ROWID
+"""
+
+
+class SeenStore:
+    """
+    Persistent seen-UID table.
+
+    One connection is shared across fetcher threads and guarded by a lock;
+    every call is a short statement, so contention is negligible.  After
+    ``close()`` the next call reopens the database (service restart).
+
+    Args:
+        path: SQLite database file
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        # Open now so an unusable file is reported at startup
+        with self._lock:
+            self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the open connection, opening it if needed (caller holds the lock)."""
+        if self._conn is None:
+            conn = sqlite3.connect(str(self._path), isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def load(self, account: str, folder: str, uidvalidity: int) -> list[int]:
+        """Return stored UIDs for the folder, discarding rows from older UIDVALIDITY values."""
+        with self._lock:
+            conn = self._connect()
+            cur = conn.execute(
+                "DELETE FROM seen WHERE account=? AND folder=? AND uidvalidity<>?",
+                (account, folder, uidvalidity),
+            )
+            if cur.rowcount:
+                logger.info(
+                    "UIDVALIDITY changed for [%s]/%s, dropped %d seen records",
+                    account,
+                    folder,
+                    cur.rowcount,
+                )
+            rows = conn.execute(
+                "SELECT uid FROM seen WHERE account=? AND folder=? AND uidvalidity=? ORDER BY uid",
+                (account, folder, uidvalidity),
+            ).fetchall()
+        return [uid for (uid,) in rows]
+
+    def add(self, account: str, folder: str, uidvalidity: int, uids: Iterable[int]) -> None:
+        """Record UIDs as seen (duplicates are ignored)."""
+        params = [(account, folder, uidvalidity, uid) for uid in uids]
+        if not params:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?, ?, ?)", params)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def clear(self, account: str) -> None:
+        """Forget every seen UID of an account."""
+        with self._lock:
+            self._connect().execute("DELETE FROM seen WHERE account=?", (account,))
+
+    def close(self) -> None:
+        """Close the database connection; a later call reopens it."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -69,7 +69,7 @@ def main_menu(config_path: Path) -> None:
             console.print("[dim]Bye.[/dim]")
             break
         elif choice == CHOICE_START:
-            _run_service(config)
+            _run_service(config, config_path)
         elif choice == CHOICE_CONFIG:
             config = _config_wizard(config, config_path)
         elif choice == CHOICE_BOT:
@@ -95,7 +95,7 @@ def _load_or_default(path: Path) -> AppConfig:
     return AppConfig()
 
 
-def _run_service(config: AppConfig) -> None:
+def _run_service(config: AppConfig, config_path: Path) -> None:
     """Start the service in the foreground with live logs."""
     setup_logging(level=config.log_level)
 
@@ -106,7 +106,7 @@ def _run_service(config: AppConfig) -> None:
         console.print("[yellow]Warning: No notifiers configured. Run Bot Settings first.[/yellow]")
         return
 
-    manager = ServiceManager(config)
+    manager = ServiceManager(config, config_path=config_path)
     manager.start()
     console.print("[green]Service started — Ctrl+C to stop[/green]\n")
 
@@ -152,7 +152,7 @@ def _config_wizard(config: AppConfig, config_path: Path) -> AppConfig:
 
     # Step 3: Handle add action
     if action == "Add Account":
-        new_acc = account_wizard()
+        new_acc = account_wizard(config.proxy)
         if new_acc:
             config.accounts.append(new_acc)
             config.save(config_path)
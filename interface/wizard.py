@@ -18,6 +18,7 @@ from core.models import (
     AppConfig,
     NotifierConfig,
     OperationMode,
+    ProxyConfig,
     TelegramNotifierConfig,
 )
 
@@ -35,8 +36,11 @@ PROVIDERS: dict[str, dict[str, object]] = {
 }
 
 
-def account_wizard() -> AccountConfig | None:
-    """Interactive wizard to add one IMAP account. Return None on cancel."""
+def account_wizard(proxy: ProxyConfig | None = None) -> AccountConfig | None:
+    """Interactive wizard to add one IMAP account. Return None on cancel.
+
+    The optional connection check goes through ``proxy`` when it is enabled.
+    """
     console.print("\n[bold cyan]── Add Email Account ──[/bold cyan]")
 
     # Step 1: Provider
@@ -141,7 +145,7 @@ def account_wizard() -> AccountConfig | None:
     )
 
     if verify:
-        _verify_imap(acc)
+        _verify_imap(acc, proxy)
 
     return acc
 
@@ -197,12 +201,14 @@ def bot_wizard(config: AppConfig) -> NotifierConfig | None:
 # ── Helpers ──
 
 
-def _verify_imap(acc: AccountConfig) -> None:
+def _verify_imap(acc: AccountConfig, proxy: ProxyConfig | None = None) -> None:
     """Try IMAP login and report result."""
-    from imap_tools import MailBox, MailBoxUnencrypted, MailboxLoginError
+    from imap_tools import MailboxLoginError
+
+    from core.imap_proxy import mailbox_factory
 
     console.print("[dim]Checking IMAP connection…[/dim]")
-    MailBoxCls = MailBox if acc.use_ssl else MailBoxUnencrypted
+    MailBoxCls = mailbox_factory(acc.use_ssl, proxy)
     try:
         with MailBoxCls(
             host=acc.imap_host,
@@ -73,7 +73,7 @@ def run_headless(config_path: Path) -> None:
     apply_global_proxy(config.proxy)
     setup_logging(level=config.log_level)
 
-    manager = ServiceManager(config)
+    manager = ServiceManager(config, config_path=config_path)
     manager.start()
     logger.info("Headless mode — Ctrl+C to stop")
 
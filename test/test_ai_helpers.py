@@ -0,0 +1,339 @@
+"""
+Unit tests for the pure helpers in core/ai.py (no network, no litellm calls).
+
+Run with:
+    python -m pytest test/test_ai_helpers.py -v
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from core.ai import (
+    BASE_SYSTEM_PROMPT,
+    MAX_BODY_CHARS,
+    MAX_BODY_TOKENS,
+    _EMBEDDING_INDEX,
+    _RESULT_CACHE,
+    _SIMILAR_CACHE,
+    SkipReason,
+    _build_messages,
+    _get_body_encoding,
+    _parse_response,
+    _sqlite_caches,
+    _truncate_body,
+    analyze_email,
+    analyze_email_async,
+    analyze_email_stream,
+    analyze_emails_batch,
+    build_system_prompt,
+    should_skip_ai,
+    skip_reason,
+)
+from core.models import AIConfig
+
+_PAYLOAD = json.dumps({
+    "summary": "Your invoice is ready.",
+    "category": "billing",
+    "priority": 3,
+    "extracted_code": None,
+    "source_language": "en",
+    "translation": None,
+})
+
+
+class ParseResponseTest(unittest.TestCase):
+    """Verify _parse_response handles plain and fenced JSON output."""
+
+    def test_plain_json(self) -> None:
+        result = _parse_response(_PAYLOAD)
+        self.assertEqual(result.category, "billing")
+        self.assertEqual(result.priority, 3)
+
+    def test_json_fence(self) -> None:
+        result = _parse_response(f"```json\n{_PAYLOAD}\n```")
+        self.assertEqual(result.summary, "Your invoice is ready.")
+
+    def test_uppercase_json_fence(self) -> None:
+        result = _parse_response(f"```JSON\n{_PAYLOAD}\n```")
+        self.assertEqual(result.priority, 3)
+
+    def test_bare_fence_with_whitespace(self) -> None:
+        result = _parse_response(f"  ```\n{_PAYLOAD}\n```  ")
+        self.assertEqual(result.source_language, "en")
+
+    def test_invalid_json_raises(self) -> None:
+        with self.assertRaises(ValueError):
+            _parse_response("```json\nnot json\n```")
+
+
+class ShouldSkipAITest(unittest.TestCase):
+    """Verify the Hybrid-mode skip heuristic."""
+
+    def test_short_body_is_skipped(self) -> None:
+        self.assertTrue(should_skip_ai("Hi there"))
+
+    def test_verification_code_is_skipped(self) -> None:
+        body = "Your verification code is 123456. " + "x" * 120
+        self.assertTrue(should_skip_ai(body))
+
+    def test_long_regular_body_is_not_skipped(self) -> None:
+        body = "Quarterly report attached, please review before Friday. " * 5
+        self.assertFalse(should_skip_ai(body))
+
+    def test_skip_reasons(self) -> None:
+        self.assertIs(skip_reason(""), SkipReason.TOO_SHORT)
+        self.assertIs(skip_reason("Lunch tomorrow at noon?"), SkipReason.SHORT_BODY)
+        body = "Your login code: 8812. " + "x" * 120
+        self.assertIs(skip_reason(body), SkipReason.ACTION_CODE)
+
+
+class SystemPromptTest(unittest.TestCase):
+    """Verify the static prompt prefix stays stable across config changes."""
+
+    def test_static_prefix_first(self) -> None:
+        en = build_system_prompt(AIConfig(language="en"), "- Rule A")
+        zh = build_system_prompt(AIConfig(language="zh"), "- Rule A")
+        prefix = f"{BASE_SYSTEM_PROMPT}\n\n- Rule A"
+        self.assertTrue(en.startswith(prefix))
+        self.assertTrue(zh.startswith(prefix))
+        self.assertIn("English", en)
+
+    def test_anthropic_marks_prefix_cacheable(self) -> None:
+        config = AIConfig(provider="anthropic", model="claude-3-5-haiku-latest", language="en")
+        system = _build_messages("Hi", "a@example.com", "body", config, None)[0]["content"]
+        self.assertEqual(system[0]["text"], BASE_SYSTEM_PROMPT)
+        self.assertEqual(system[0]["cache_control"], {"type": "ephemeral"})
+        self.assertNotIn("cache_control", system[1])
+
+
+class TruncateBodyTest(unittest.TestCase):
+    """Verify the character cap and the token budget."""
+
+    def test_char_cap(self) -> None:
+        self.assertEqual(len(_truncate_body("a b " * 2000)), MAX_BODY_CHARS)
+
+    def test_cjk_respects_token_budget(self) -> None:
+        encoding = _get_body_encoding()
+        if encoding is None:
+            self.skipTest("tiktoken encoding not available")
+        body = "邮件内容测试，请查收附件中的发票。" * 200
+        truncated = _truncate_body(body)
+        self.assertTrue(body.startswith(truncated))
+        self.assertLessEqual(len(encoding.encode(truncated)), MAX_BODY_TOKENS)
+
+
+def _fake_completion(content: str) -> SimpleNamespace:
+    """Build a minimal object shaped like a litellm completion response."""
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class ResultCacheTest(unittest.TestCase):
+    """Verify identical prompts are served from the in-memory result cache."""
+
+    def setUp(self) -> None:
+        _RESULT_CACHE.clear()
+        _SIMILAR_CACHE.clear()
+        _EMBEDDING_INDEX.clear()
+        self.config = AIConfig(enabled=True, model="gpt-4o-mini", language="en")
+
+    def tearDown(self) -> None:
+        _RESULT_CACHE.clear()
+        _SIMILAR_CACHE.clear()
+        _EMBEDDING_INDEX.clear()
+
+    def test_repeat_call_hits_cache(self) -> None:
+        body = "Please find the invoice for March attached to this message. " * 3
+        with patch("litellm.completion", return_value=_fake_completion(_PAYLOAD)) as mock:
+            first = analyze_email("Invoice", "billing@example.com", body, self.config)
+            second = analyze_email("Invoice", "billing@example.com", body, self.config)
+
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual(first, second)
+
+    def test_language_change_misses_cache(self) -> None:
+        body = "Please find the invoice for March attached to this message. " * 3
+        with patch("litellm.completion", return_value=_fake_completion(_PAYLOAD)) as mock:
+            analyze_email("Invoice", "billing@example.com", body, self.config)
+            self.config.language = "zh"
+            analyze_email("Invoice", "billing@example.com", body, self.config)
+
+        self.assertEqual(mock.call_count, 2)
+
+    def test_trivial_body_skips_llm(self) -> None:
+        with patch("litellm.completion") as mock:
+            result = analyze_email("Hi", "friend@example.com", "ok", self.config)
+
+        mock.assert_not_called()
+        self.assertEqual(result.category, "notification")
+
+    def test_verification_code_classified_locally(self) -> None:
+        self.config.local_code_extraction = True
+        body = "Your verification code is 482913. It expires in 10 minutes."
+        with patch("litellm.completion") as mock:
+            result = analyze_email("Sign-in code", "no-reply@example.com", body, self.config)
+
+        mock.assert_not_called()
+        self.assertEqual(result.category, "verification_code")
+        self.assertEqual(result.extracted_code, "482913")
+
+    def test_short_code_email_still_classified_locally(self) -> None:
+        self.config.local_code_extraction = True
+        body = "Login code: 482913"
+        self.assertIs(skip_reason(body), SkipReason.TOO_SHORT)
+        with patch("litellm.completion") as mock:
+            result = analyze_email("Sign-in", "no-reply@example.com", body, self.config)
+
+        mock.assert_not_called()
+        self.assertEqual(result.extracted_code, "482913")
+
+    def test_numbers_near_code_words_go_to_llm(self) -> None:
+        self.config.local_code_extraction = True
+        bodies = [
+            "Your code review request #12345 is waiting for you.",
+            "Your code in commit 48213 broke the build.",
+            "Your access code for building 2231 changed.",
+            "Your confirmation code is below: order 20241015 shipped.",
+            "Verification code #12345 was reported as a duplicate ticket.",
+        ]
+        for body in bodies:
+            _RESULT_CACHE.clear()
+            with self.subTest(body=body), \
+                    patch("litellm.completion", return_value=_fake_completion(_PAYLOAD)) as mock:
+                result = analyze_email("Update", "dev@example.com", body, self.config)
+                mock.assert_called_once()
+                self.assertIsNone(result.extracted_code)
+
+    def test_local_code_extraction_off_by_default(self) -> None:
+        self.assertFalse(AIConfig().local_code_extraction)
+        body = "Your verification code is 482913. It expires in 10 minutes."
+        with patch("litellm.completion", return_value=_fake_completion(_PAYLOAD)) as mock:
+            analyze_email("Sign-in code", "no-reply@example.com", body, self.config)
+
+        mock.assert_called_once()
+
+    def test_missing_choices_returns_default(self) -> None:
+        body = "Please find the invoice for March attached to this message. " * 3
+        with patch("litellm.completion", return_value=SimpleNamespace(choices=[])):
+            result = analyze_email("Invoice", "billing@example.com", body, self.config)
+
+        self.assertEqual(result.category, "notification")
+
+    def test_failed_call_is_not_cached(self) -> None:
+        body = "Please find the invoice for March attached to this message. " * 3
+        with patch("litellm.completion", return_value=_fake_completion("")) as mock:
+            analyze_email("Invoice", "billing@example.com", body, self.config)
+            analyze_email("Invoice", "billing@example.com", body, self.config)
+
+        self.assertEqual(mock.call_count, 2)
+
+    def test_near_duplicate_is_not_reused_by_default(self) -> None:
+        body = "Your weekly digest: 3 new posts in the community forum. " * 3
+        with patch("litellm.completion", return_value=_fake_completion(_PAYLOAD)) as mock:
+            analyze_email("Digest", "news@example.com", body, self.config)
+            analyze_email("Digest", "news@example.com", body.replace("3", "7"), self.config)
+
+        self.assertEqual(mock.call_count, 2)
+
+    def test_near_duplicate_hits_when_enabled(self) -> None:
+        self.config.semantic_cache_enabled = True
+        body = "Your weekly digest: 3 new posts in the community forum. " * 3
+        with patch("litellm.completion", return_value=_fake_completion(_PAYLOAD)) as mock:
+            analyze_email("Digest", "news@example.com", body, self.config)
+            analyze_email("Digest", "news@example.com", body.replace("3", "7"), self.config)
+
+        self.assertEqual(mock.call_count, 1)
+
+    def test_paraphrase_hits_embedding_cache(self) -> None:
+        self.config.semantic_cache_enabled = True
+        self.config.semantic_cache_embedding_model = "text-embedding-3-small"
+        embedding = SimpleNamespace(data=[{"embedding": [0.6, 0.8, 0.0]}])
+        with patch("litellm.completion", return_value=_fake_completion(_PAYLOAD)) as mock, \
+                patch("litellm.embedding", return_value=embedding):
+            analyze_email("Digest", "news@example.com", "Weekly digest of forum posts. " * 5, self.config)
+            analyze_email("Digest", "news@example.com", "This week's forum highlights. " * 5, self.config)
+
+        self.assertEqual(mock.call_count, 1)
+
+    def test_persistent_store_survives_memory_clear(self) -> None:
+        body = "Please find the invoice for March attached to this message. " * 3
+        with tempfile.TemporaryDirectory() as tmp:
+            self.config.result_cache_path = str(Path(tmp) / "ai_cache.db")
+            with patch("litellm.completion", return_value=_fake_completion(_PAYLOAD)) as mock:
+                first = analyze_email("Invoice", "billing@example.com", body, self.config)
+                _RESULT_CACHE.clear()
+                second = analyze_email("Invoice", "billing@example.com", body, self.config)
+            _sqlite_caches.pop(self.config.result_cache_path).close()
+
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual(first, second)
+
+    def test_stream_reports_summary_before_completion(self) -> None:
+        body = "Please find the invoice for March attached to this message. " * 3
+        pieces = [_PAYLOAD[i:i + 16] for i in range(0, len(_PAYLOAD), 16)]
+        seen: list[tuple[str, int]] = []
+
+        async def fake_stream():
+            for i, piece in enumerate(pieces):
+                seen.append(("chunk", i))
+                delta = SimpleNamespace(content=piece)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+        async def fake_acompletion(**kwargs):
+            return fake_stream()
+
+        async def on_summary(summary: str) -> None:
+            seen.append((summary, len(seen)))
+
+        with patch("litellm.acompletion", side_effect=fake_acompletion):
+            result = asyncio.run(analyze_email_stream(
+                "Invoice", "billing@example.com", body, self.config, on_summary=on_summary,
+            ))
+
+        self.assertEqual(result.category, "billing")
+        summaries = [entry for entry in seen if entry[0] != "chunk"]
+        self.assertEqual(summaries[0][0], "Your invoice is ready.")
+        self.assertLess(summaries[0][1], len(pieces))
+
+    def test_translate_after_summary_reuses_result(self) -> None:
+        body = "Please find the invoice for March attached to this message. " * 3
+
+        async def fake_stream():
+            delta = SimpleNamespace(content=_PAYLOAD)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+        async def fake_acompletion(**kwargs):
+            return fake_stream()
+
+        with patch("litellm.acompletion", side_effect=fake_acompletion) as mock:
+            summary = asyncio.run(analyze_email_stream("Invoice", "billing@example.com", body, self.config))
+            translate = asyncio.run(analyze_email_async("Invoice", "billing@example.com", body, self.config))
+
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual(summary, translate)
+
+    def test_batch_preserves_order_and_uses_cache(self) -> None:
+        body = "Please find the invoice for March attached to this message. " * 3
+        items = [
+            ("Invoice", "billing@example.com", body),
+            ("Invoice", "billing@example.com", body + " Thanks."),
+        ]
+        responses = [_fake_completion(_PAYLOAD), _fake_completion("")]
+        with patch("litellm.acompletion", side_effect=responses) as mock:
+            results = asyncio.run(analyze_emails_batch(items, self.config))
+            again = asyncio.run(analyze_emails_batch(items[:1], self.config))
+
+        self.assertEqual(mock.call_count, 2)
+        self.assertEqual(results[0].category, "billing")
+        self.assertEqual(again[0], results[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,9 @@
 """
-Test that litellm completion works through proxy when socket is monkey-patched.
+Test that proxying never patches the process-wide socket.
 
-This reproduces the double-proxying bug: apply_global_proxy() patches both
-env vars AND socket.socket, causing httpx to double-proxy and fail with
-SSLEOFError.  The fix in ai.py uses _bypass_socket_proxy() to temporarily
-restore the original socket during litellm calls.
+apply_global_proxy() used to patch socket.socket as well as the env vars,
+so httpx double-proxied its connections and failed with SSLEOFError.  Only
+the env vars are set now; IMAP is tunnelled explicitly by core.imap_proxy.
 
 Run with:
     python -m pytest test/test_proxy_double_proxy.py -v
@@ -16,66 +15,66 @@ import os
 import socket
 import unittest
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
-from core.ai import _bypass_socket_proxy
-from utils.helpers import _ORIGINAL_SOCKET
+from imap_tools import MailBox, MailBoxUnencrypted
 
+from core.imap_proxy import mailbox_factory
+from core.models import ProxyConfig
+from utils.helpers import apply_global_proxy
 
-class BypassSocketProxyTest(unittest.TestCase):
-    """Verify _bypass_socket_proxy restores and re-patches socket correctly."""
+_PROXY_ENV = ("http_proxy", "https_proxy", "HTTP_PROXY", "HTTPS_PROXY")
 
-    def test_restores_original_socket_inside_context(self) -> None:
-        """Inside the context manager, socket.socket should be the original."""
-        fake_patched = MagicMock(name="socks.socksocket")
-        saved = socket.socket
 
-        # Simulate monkey-patched socket
-        socket.socket = fake_patched
-        try:
-            self.assertIs(socket.socket, fake_patched)
-
-            with _bypass_socket_proxy():
-                # Inside: should be the original (un-patched) socket
-                self.assertIs(socket.socket, _ORIGINAL_SOCKET)
-
-            # After: should be re-patched
-            self.assertIs(socket.socket, fake_patched)
-        finally:
-            socket.socket = saved
-
-    def test_restores_patched_socket_on_exception(self) -> None:
-        """Even if the body raises, the patched socket should be restored."""
-        fake_patched = MagicMock(name="socks.socksocket")
-        saved = socket.socket
-
-        socket.socket = fake_patched
-        try:
-            with self.assertRaises(RuntimeError):
-                with _bypass_socket_proxy():
-                    self.assertIs(socket.socket, _ORIGINAL_SOCKET)
-                    raise RuntimeError("boom")
+class ApplyGlobalProxyTest(unittest.TestCase):
+    """apply_global_proxy only touches the proxy env vars."""
 
-            # Patched socket should be restored despite exception
-            self.assertIs(socket.socket, fake_patched)
-        finally:
-            socket.socket = saved
+    def setUp(self) -> None:
+        self._saved_env = {key: os.environ.get(key) for key in _PROXY_ENV}
 
-    def test_noop_when_socket_not_patched(self) -> None:
-        """When socket is not patched, context manager is a harmless no-op."""
-        saved = socket.socket
-        # Ensure socket is original
-        socket.socket = _ORIGINAL_SOCKET
-        try:
-            with _bypass_socket_proxy():
-                self.assertIs(socket.socket, _ORIGINAL_SOCKET)
-            self.assertIs(socket.socket, _ORIGINAL_SOCKET)
-        finally:
-            socket.socket = saved
+    def tearDown(self) -> None:
+        for key, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def test_socket_is_not_patched(self) -> None:
+        original = socket.socket
+        apply_global_proxy(ProxyConfig(scheme="socks5", host="127.0.0.1", port=1080))
+        self.assertIs(socket.socket, original)
+        self.assertEqual(os.environ["HTTPS_PROXY"], "socks5://127.0.0.1:1080")
+
+    def test_disabled_proxy_clears_env(self) -> None:
+        os.environ["HTTPS_PROXY"] = "http://stale:1"
+        apply_global_proxy(None)
+        self.assertNotIn("HTTPS_PROXY", os.environ)
+
+
+class ImapProxyTest(unittest.TestCase):
+    """IMAP connections are tunnelled per connection, not via a global patch."""
+
+    def test_plain_mailbox_without_proxy(self) -> None:
+        self.assertIs(mailbox_factory(True, None), MailBox)
+        disabled = ProxyConfig(enabled=False, host="127.0.0.1", port=1080)
+        self.assertIs(mailbox_factory(False, disabled), MailBoxUnencrypted)
+
+    def test_connection_goes_through_proxy(self) -> None:
+        proxy = ProxyConfig(scheme="socks5", host="127.0.0.1", port=1080, username="u")
+        factory = mailbox_factory(False, proxy)
+        with patch("socks.create_connection", side_effect=OSError("proxy down")) as create:
+            with self.assertRaises(OSError):
+                factory(host="imap.example.com", port=143, timeout=5)
+        args, kwargs = create.call_args
+        self.assertEqual(args[0], ("imap.example.com", 143))
+        self.assertEqual(kwargs["timeout"], 5)
+        self.assertEqual(kwargs["proxy_addr"], "127.0.0.1")
+        self.assertEqual(kwargs["proxy_port"], 1080)
+        self.assertEqual(kwargs["proxy_username"], "u")
 
 
 class LiveProxyCompletionTest(unittest.TestCase):
-    """Live test: litellm completion through proxy with socket patched.
+    """Live test: litellm completion through the configured proxy.
 
     Skipped when config.json is absent or proxy/AI is disabled.
     """
@@ -103,20 +102,16 @@ class LiveProxyCompletionTest(unittest.TestCase):
 
     def test_completion_with_global_proxy_applied(self) -> None:
         """Simulate real app conditions: apply_global_proxy + analyze_email."""
-        from utils.helpers import apply_global_proxy
         from core.ai import analyze_email
 
-        # Apply global proxy exactly as main.py does (env vars + socket patch)
+        # Apply global proxy exactly as main.py does
+        original = socket.socket
         apply_global_proxy(self.proxy_cfg)
 
         try:
-            # Verify socket IS patched (reproducing the bug precondition)
-            self.assertIsNot(
-                socket.socket, _ORIGINAL_SOCKET,
-                "Socket should be monkey-patched after apply_global_proxy",
-            )
+            self.assertIs(socket.socket, original, "apply_global_proxy must not patch socket")
 
-            # This should succeed (not raise SSLEOFError) thanks to the fix
+            # This should succeed (not raise SSLEOFError) through the env proxy
             result = analyze_email(
                 subject="Test Proxy",
                 sender="test@example.com",
@@ -131,9 +126,7 @@ class LiveProxyCompletionTest(unittest.TestCase):
             ])
             print(f"AI result: category={result.category} priority={result.priority}")
         finally:
-            # Clean up: restore original socket
-            socket.socket = _ORIGINAL_SOCKET
-            for key in ("http_proxy", "https_proxy", "HTTP_PROXY", "HTTPS_PROXY"):
+            for key in _PROXY_ENV:
                 os.environ.pop(key, None)
 
 
@@ -0,0 +1,149 @@
+"""
+Unit tests for core/seen_store.py and the fetcher's use of it (no network).
+
+Run with:
+    python -m pytest test/test_seen_store.py -v
+"""
+
+from __future__ import annotations
+
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from pydantic import SecretStr
+
+from core.fetcher import EmailFetcher
+from core.models import AccountConfig, EmailSnapshot
+from core.seen_store import SeenStore
+
+
+class SeenStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "config.seen.db"
+        self.store = SeenStore(self.path)
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_round_trip(self) -> None:
+        self.store.add("acc", "INBOX", 7, [3, 1, 2, 2])
+        self.store.close()
+        reopened = SeenStore(self.path)
+        try:
+            self.assertEqual(reopened.load("acc", "INBOX", 7), [1, 2, 3])
+            self.assertEqual(reopened.load("acc", "Other", 7), [])
+        finally:
+            reopened.close()
+
+    def test_uidvalidity_change_drops_old_rows(self) -> None:
+        self.store.add("acc", "INBOX", 7, [1, 2])
+        self.store.add("acc", "Other", 7, [5])
+        self.assertEqual(self.store.load("acc", "INBOX", 8), [])
+        # Back to the old value: the rows are gone for good
+        self.assertEqual(self.store.load("acc", "INBOX", 7), [])
+        self.assertEqual(self.store.load("acc", "Other", 7), [5])
+
+    def test_clear_account(self) -> None:
+        self.store.add("acc", "INBOX", 7, [1])
+        self.store.add("other", "INBOX", 7, [1])
+        self.store.clear("acc")
+        self.assertEqual(self.store.load("acc", "INBOX", 7), [])
+        self.assertEqual(self.store.load("other", "INBOX", 7), [1])
+
+    def test_reopens_after_close(self) -> None:
+        self.store.add("acc", "INBOX", 7, [1])
+        self.store.close()
+        self.assertEqual(self.store.load("acc", "INBOX", 7), [1])
+
+
+class _FakeMailbox:
+    """Minimal imap_tools stand-in: one folder, a fixed unseen set."""
+
+    def __init__(self, messages: dict[str, datetime], uidvalidity: int = 7) -> None:
+        self.messages = messages
+        self.folder = SimpleNamespace(set=lambda name: None)
+        self.client = SimpleNamespace(response=lambda code: ("OK", [str(uidvalidity).encode()]))
+        self.fetched: list[tuple[list[str], bool]] = []
+
+    def uids(self, criteria) -> list[str]:  # noqa: ANN001
+        return sorted(self.messages, key=int)
+
+    def fetch(self, uid_list, headers_only=False, **kwargs):  # noqa: ANN001, ANN003
+        self.fetched.append((list(uid_list), headers_only))
+        for uid in uid_list:
+            yield SimpleNamespace(uid=uid, date=self.messages[uid])
+
+
+def _snapshot(msg, account: AccountConfig) -> EmailSnapshot:  # noqa: ANN001
+    return EmailSnapshot(uid=msg.uid, account_name=account.name)
+
+
+@patch("core.fetcher.parse_email", side_effect=_snapshot)
+class FetcherSeenTest(unittest.TestCase):
+    """_do_fetch bootstrap, pre-start filtering and restart via the seen store."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = SeenStore(Path(self._tmp.name) / "config.seen.db")
+        self.account = AccountConfig(
+            name="acc", email="a@example.com", password=SecretStr("x"), imap_host="imap.example.com",
+        )
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self._tmp.cleanup()
+
+    def _fetcher(self, mailbox: _FakeMailbox) -> EmailFetcher:
+        fetcher = EmailFetcher(self.account, seen_store=self.store)
+        fetcher._get_mailbox = lambda: mailbox  # type: ignore[method-assign]
+        return fetcher
+
+    def test_bootstrap_records_without_forwarding(self, _parse) -> None:  # noqa: ANN001
+        now = datetime.now(timezone.utc)
+        mailbox = _FakeMailbox({"1": now, "2": now})
+        fetcher = self._fetcher(mailbox)
+
+        self.assertEqual(fetcher._do_fetch(), [])
+        self.assertEqual(mailbox.fetched, [])
+        self.assertEqual(self.store.load("acc", "INBOX", 7), [1, 2])
+
+    def test_new_mail_after_bootstrap(self, _parse) -> None:  # noqa: ANN001
+        mailbox = _FakeMailbox({"1": datetime.now(timezone.utc)})
+        fetcher = self._fetcher(mailbox)
+        fetcher._do_fetch()
+
+        later = datetime.now(timezone.utc) + timedelta(minutes=1)
+        before_start = fetcher._started_at - timedelta(hours=1)
+        mailbox.messages.update({"2": before_start, "3": later})
+        snapshots = fetcher._do_fetch()
+
+        self.assertEqual([s.uid for s in snapshots], ["3"])
+        # Headers pass sees both, the full fetch only the post-start message
+        self.assertEqual(mailbox.fetched, [(["2", "3"], True), (["3"], False)])
+        self.assertEqual(self.store.load("acc", "INBOX", 7), [1, 2, 3])
+        self.assertEqual(fetcher._do_fetch(), [])
+
+    def test_restart_skips_bootstrap(self, _parse) -> None:  # noqa: ANN001
+        self.store.add("acc", "INBOX", 7, [1])
+        mailbox = _FakeMailbox({
+            "1": datetime.now(timezone.utc),
+            "2": datetime.now(timezone.utc) + timedelta(minutes=1),
+        })
+        snapshots = self._fetcher(mailbox)._do_fetch()
+        self.assertEqual([s.uid for s in snapshots], ["2"])
+
+    def test_uidvalidity_change_bootstraps_again(self, _parse) -> None:  # noqa: ANN001
+        self.store.add("acc", "INBOX", 6, [1])
+        mailbox = _FakeMailbox({"1": datetime.now(timezone.utc), "2": datetime.now(timezone.utc)})
+        self.assertEqual(self._fetcher(mailbox)._do_fetch(), [])
+        self.assertEqual(self.store.load("acc", "INBOX", 7), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
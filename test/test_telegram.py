@@ -0,0 +1,104 @@
+"""
+Unit tests for Telegram batching and the bot's update-offset sidecar (no network).
+
+Run with:
+    python -m pytest test/test_telegram.py -v
+"""
+
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from pydantic import SecretStr
+
+from core.bot import TelegramBotHandler
+from core.models import AIConfig, EmailSnapshot, TelegramNotifierConfig
+from core.notifiers.telegram import BATCH_SEPARATOR, MESSAGE_MAX_CHARS, TelegramNotifier
+
+_SEP_SIZE = len(BATCH_SEPARATOR.encode("utf-16-le")) // 2
+
+
+def _notifier() -> TelegramNotifier:
+    return TelegramNotifier(TelegramNotifierConfig(bot_token=SecretStr("123:abc"), chat_id="1"))
+
+
+class SendManyTest(unittest.TestCase):
+    """send_many packs messages up to MESSAGE_MAX_CHARS UTF-16 code units."""
+
+    def _send(self, texts: list[str], ok: list[bool] | None = None) -> tuple[list[bool], list[str]]:
+        notifier = _notifier()
+        snapshots = [EmailSnapshot(uid=str(i), account_name="acc") for i in range(len(texts))]
+        by_uid = dict(zip((s.uid for s in snapshots), texts))
+        sent: list[str] = []
+        replies = iter(ok or [True] * len(texts))
+
+        def send_text(text: str) -> bool:
+            sent.append(text)
+            return next(replies)
+
+        with patch.object(notifier, "format_message", side_effect=lambda s: by_uid[s.uid]), \
+                patch.object(notifier, "_send_text", side_effect=send_text):
+            return notifier.send_many(snapshots), sent
+
+    def test_exact_fit_is_one_message(self) -> None:
+        first = "a" * 2000
+        second = "b" * (MESSAGE_MAX_CHARS - 2000 - _SEP_SIZE)
+        results, sent = self._send([first, second])
+        self.assertEqual(results, [True, True])
+        self.assertEqual(sent, [first + BATCH_SEPARATOR + second])
+
+    def test_one_unit_over_splits(self) -> None:
+        first = "a" * 2000
+        second = "b" * (MESSAGE_MAX_CHARS - 2000 - _SEP_SIZE + 1)
+        _, sent = self._send([first, second])
+        self.assertEqual(sent, [first, second])
+
+    def test_astral_chars_count_twice(self) -> None:
+        # Each emoji is one str char but two UTF-16 code units, as Telegram counts
+        first = "\U0001F511" * 1000
+        second = "b" * (MESSAGE_MAX_CHARS - 2000 - _SEP_SIZE + 1)
+        self.assertLessEqual(len(first) + len(BATCH_SEPARATOR) + len(second), MESSAGE_MAX_CHARS)
+        _, sent = self._send([first, second])
+        self.assertEqual(len(sent), 2)
+
+    def test_results_follow_their_message(self) -> None:
+        texts = ["a" * 3000, "b" * 3000, "c" * 10]
+        results, sent = self._send(texts, ok=[True, False])
+        self.assertEqual(sent, [texts[0], texts[1] + BATCH_SEPARATOR + texts[2]])
+        self.assertEqual(results, [True, False, False])
+
+
+class OffsetSidecarTest(unittest.TestCase):
+    """The bot keeps its last update offset in <config>.offset."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.config_path = Path(self._tmp.name) / "config.json"
+        self.bot = TelegramBotHandler(_notifier(), AIConfig(), config_path=self.config_path)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_path_next_to_config(self) -> None:
+        self.assertEqual(self.bot._offset_path, Path(self._tmp.name) / "config.offset")
+
+    def test_missing_file(self) -> None:
+        self.assertIsNone(self.bot._load_offset())
+
+    def test_round_trip(self) -> None:
+        self.bot._persist_offset(42)
+        self.assertEqual(self.bot._load_offset(), 42)
+        self.bot._persist_offset(43)
+        self.assertEqual(self.bot._load_offset(), 43)
+        self.assertEqual(sorted(p.name for p in Path(self._tmp.name).iterdir()), ["config.offset"])
+
+    def test_unreadable_file(self) -> None:
+        self.bot._offset_path.write_text("not json", encoding="utf-8")
+        self.assertIsNone(self.bot._load_offset())
+
+
+if __name__ == "__main__":
+    unittest.main()
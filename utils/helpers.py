@@ -7,7 +7,6 @@ Shared CLI helpers: banners, tables, formatting.
 from __future__ import annotations
 
 import os
-import socket
 
 from rich.console import Console
 from rich.panel import Panel
@@ -17,9 +16,6 @@ from core.models import ProxyConfig
 
 console = Console()
 
-# Preserve the original socket class so we can restore when proxy is disabled
-_ORIGINAL_SOCKET = socket.socket
-
 BANNER = r"""
    __  ___      _ __  ____        __
   /  |/  /___ _(_) / / __ )____  / /_
@@ -95,31 +91,23 @@ def confirm_or_abort(msg: str = "Continue?") -> bool:
 
 
 def apply_global_proxy(proxy: ProxyConfig | None) -> None:
-    """Apply or clear a global proxy for HTTP (requests) and IMAP (socket).
+    """Apply or clear the global proxy for HTTP clients.
 
-    This sets HTTP(S)_PROXY environment variables and, when enabled, monkey-patches
-    the default socket to route IMAP (imaplib) traffic through the proxy using PySocks.
+    This sets HTTP(S)_PROXY environment variables, which requests and httpx
+    (litellm) pick up per client.  IMAP connections are proxied explicitly by
+    the fetcher (see ``core.imap_proxy``); ``socket.socket`` is never patched.
     """
-    global _ORIGINAL_SOCKET
-
-    # Helper to restore default socket
-    def _restore_socket() -> None:
-        if socket.socket is not _ORIGINAL_SOCKET:
-            socket.socket = _ORIGINAL_SOCKET
-
     # Clear env proxies first
     for key in ("http_proxy", "https_proxy", "HTTP_PROXY", "HTTPS_PROXY"):
         os.environ.pop(key, None)
 
     if not proxy or not proxy.enabled:
-        _restore_socket()
         return
 
     try:
-        import socks  # type: ignore
+        import socks  # type: ignore  # noqa: F401
     except Exception:
         console.print("[red]Proxy requested but PySocks is missing. Install with: pip install PySocks[/red]")
-        _restore_socket()
         return
 
     proxy_url = proxy.as_url()
@@ -127,22 +115,3 @@ def apply_global_proxy(proxy: ProxyConfig | None) -> None:
     os.environ["https_proxy"] = proxy_url
     os.environ["HTTP_PROXY"] = proxy_url
     os.environ["HTTPS_PROXY"] = proxy_url
-
-    scheme = proxy.scheme.lower()
-    if scheme == "socks5":
-        socks_type = socks.SOCKS5
-    elif scheme == "socks4":
-        socks_type = socks.SOCKS4
-    else:
-        socks_type = socks.HTTP
-
-    socks.set_default_proxy(
-        socks_type,
-        addr=proxy.host,
-        port=proxy.port,
-        username=proxy.username,
-        password=proxy.password.get_secret_value() if proxy.password else None,
-    )
-
-    # Route all future socket connections through the proxy
-    socket.socket = socks.socksocket